@@ -1,6 +1,8 @@
 # account_type_model.py
+from rule_messages import messages_for
 
-def recommend_account_type_logic(data):
+def recommend_account_type_logic(data, lang='en'):
+    t = messages_for(lang)
     # Simple rules-based logic for account type recommendation
     account_purpose = data.get('accountPurpose')
     initial_deposit = data.get('initialDeposit')
@@ -8,15 +10,15 @@ def recommend_account_type_logic(data):
     account_usage = data.get('accountUsage')
 
     if account_purpose == 'Savings' and initial_deposit == 'Less than ₹10,000':
-        recommendation = 'Basic Savings Account'
+        recommendation = t('accountBasicSavings')
     elif account_purpose == 'Business' or monthly_transactions == 'More than 50':
-        recommendation = 'Current Account'
+        recommendation = t('accountCurrent')
     elif account_purpose == 'Investment' and initial_deposit == 'More than ₹50,000':
-        recommendation = 'Premium Savings Account'
+        recommendation = t('accountPremiumSavings')
     elif account_usage == 'Regular salary deposits':
-        recommendation = 'Salary Account'
+        recommendation = t('accountSalary')
     elif account_purpose == 'Savings' and initial_deposit == '₹10,000 - ₹50,000':
-        recommendation = 'Regular Savings Account'
+        recommendation = t('accountRegularSavings')
     else:
-        recommendation = 'Basic Savings Account'
+        recommendation = t('accountBasicSavings')
     return {'recommended_account_type': recommendation} 
\ No newline at end of file
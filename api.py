@@ -1,9 +1,19 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
-import joblib
+from forest_engine import load_model
+import os
+from micro_batcher import MicroBatcher
 
-# Load the trained model
-model = joblib.load("savings_recommendation_model.pkl")
+# Load the trained model (arrays memory-mapped, shared between workers)
+model = load_model("savings_recommendation_model.pkl")
+
+# Concurrent /predict calls are stacked into one model.predict call
+batcher = MicroBatcher(
+    lambda rows: model.predict(rows),
+    max_rows=int(os.environ.get("SAVINGS_BATCH_ROWS", 64)),
+    max_wait_ms=float(os.environ.get("SAVINGS_BATCH_WAIT_MS", 2.0)),
+    name="savings-batcher"
+)
 
 app = FastAPI()
 
@@ -16,5 +26,9 @@ class UserInput(BaseModel):
 @app.post("/predict")
 def predict_savings(data: UserInput):
     X = [[data.income, data.expenses, data.goal_amount, data.months_to_goal]]
-    prediction = model.predict(X)[0]
-    return {"recommended_saving": prediction} 
\ No newline at end of file
+    prediction = batcher.predict(X)[0]
+    return {"recommended_saving": prediction}
+
+@app.get("/predict/stats")
+def predict_stats():
+    return batcher.stats()
\ No newline at end of file
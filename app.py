@@ -1,9 +1,11 @@
 import os
+import hmac
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from phishing_model import check_phishing
 from inflation_model import predict_inflation_rate
-from translation_model import translate_text
+from translation_model import supported_language, translate_response, translation_cache_stats
+from rule_messages import has_catalog
+from ttl_cache import TTLCache, MISSING
 # from models import db, User  # Commented out for deployment
 from account_type_model import recommend_account_type_logic
 from savings_method_model import recommend_savings_method_logic
@@ -14,6 +16,15 @@ from insurance_model import recommend_insurance_logic
 app = Flask(__name__)
 CORS(app)
 
+# phishing_model pulls in numpy, tldextract, whois, asyncio and the model arrays,
+# so it is imported by the first request that needs it. Set APP_EAGER_LOAD=1
+# (or start through create_app) to load and warm it up at startup instead.
+EAGER_LOAD = os.environ.get('APP_EAGER_LOAD', '0') == '1'
+
+def phishing():
+    import phishing_model
+    return phishing_model
+
 # Database configuration commented out for deployment
 # app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://apple@localhost/archive'
 # app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -33,9 +44,56 @@ def register_user():
 def api_check_url():
     data = request.get_json()
     url = data.get('url') if data else None
-    result = check_phishing(url)
+    # Network probes share one deadline; callers may ask for a tighter one
+    import asyncio
+    phishing_model = phishing()
+    budget = phishing_model.PROBE_BUDGET
+    if data and data.get('budget_ms') is not None:
+        try:
+            budget = min(phishing_model.PROBE_BUDGET, float(data['budget_ms']) / 1000)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'budget_ms must be a number'}), 400
+    staged = bool(data.get('staged', phishing_model.PHISHING_STAGED)) if data else phishing_model.PHISHING_STAGED
+    result = asyncio.run(phishing_model.check_phishing_async(url, budget, staged))
+    return jsonify(result), 200 if 'error' not in result else 400
+
+@app.route('/api/check/batch', methods=['POST'])
+def api_check_batch():
+    data = request.get_json()
+    urls = data.get('urls') if data else None
+    phishing_model = phishing()
+    staged = bool(data.get('staged', phishing_model.PHISHING_STAGED)) if data else phishing_model.PHISHING_STAGED
+    result = phishing_model.check_phishing_batch(urls, staged=staged)
     return jsonify(result), 200 if 'error' not in result else 400
 
+@app.route('/api/check/cache_stats', methods=['GET'])
+def api_check_cache_stats():
+    return jsonify(phishing().phishing_cache_stats())
+
+@app.route('/api/check/ml_stats', methods=['GET'])
+def api_check_ml_stats():
+    return jsonify(phishing().phishing_ml_stats())
+
+# Admin endpoints are off unless ADMIN_TOKEN is set; callers send it as X-Admin-Token
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+def is_admin():
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
+
+@app.route('/api/admin/models/phishing/reload', methods=['POST'])
+def api_admin_reload_phishing_model():
+    if not is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+    data = request.get_json(silent=True) or {}
+    # With a version it is also activated on disk, so other workers pick it up
+    # through their file watch
+    status = phishing().reload_ml_model(data.get('version'))
+    return jsonify(status), 200 if status['error'] is None else 500
+
+@app.route('/api/translation/cache_stats', methods=['GET'])
+def api_translation_cache_stats():
+    return jsonify(translation_cache_stats())
+
 @app.route('/predict_inflation', methods=['POST'])
 def predict_inflation():
     data = request.get_json()
@@ -43,75 +101,127 @@ def predict_inflation():
     predicted_inflation = predict_inflation_rate(years)
     return jsonify({'inflation_rate': round(predicted_inflation, 1)})
 
+# Text fields of each recommend_* response, translated for languages without a message catalog
+SAVINGS_METHOD_TEXT = [('recommended_method',), ('reason',)]
+ACCOUNT_TYPE_TEXT = [('recommended_account_type',)]
+BUDGET_TEXT = [('investment_recommendation', 'type'), ('investment_recommendation', 'reason'), ('tips',), ('warnings',)]
+CREDIT_SCORE_TEXT = [('score_description',), ('score_range',), ('improvement_timeline',), ('tips',), ('warnings',), ('next_steps',),
+                     ('factors', '*', 'status'), ('factors', '*', 'score_impact')]
+INSURANCE_TEXT = [('coverage', 'health_coverage'), ('coverage', 'vehicle_coverage'), ('coverage_adequacy',), ('recommendations',),
+                  ('warnings',), ('tips',), ('next_steps',), ('risk_assessment', '*')]
+
+# Finished JSON bodies of the rule-based endpoints, keyed by (rule set, target_lang,
+# RuleSet.cache_key): the input reduced to the bands the rules branch on, so every
+# profile in the same bands is served the same bytes from memory
+RESPONSE_CACHE = TTLCache(maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', 20000)))
+RESPONSE_CACHE_STATS = {'uncacheable': 0, 'pending': 0}
+
+def rules(name):
+    # rule_engine needs numpy, so it is loaded by the first request (or warm_up)
+    from rule_engine import get_rules
+    return get_rules(name)
+
+def language_error(target_lang):
+    # Without a message catalog the text goes through the translation backend,
+    # which can't produce every code
+    if has_catalog(target_lang) or supported_language(target_lang):
+        return None
+    return jsonify({'error': f'Unsupported target_lang: {target_lang}'}), 400
+
+def recommend(name, logic, text_paths, data):
+    target_lang = data.get('target_lang', 'en')
+    error = language_error(target_lang)
+    if error:
+        return error
+    key = rules(name).cache_key(data)
+    if key is None:
+        RESPONSE_CACHE_STATS['uncacheable'] += 1
+    else:
+        key = (name, target_lang, key)
+        body = RESPONSE_CACHE.get(key)
+        if body is not MISSING:
+            return app.response_class(body, mimetype='application/json')
+    if has_catalog(target_lang):
+        # en/hi/pa are rendered from the compiled message catalogs (build_message_catalogs.py)
+        result = logic(data, target_lang)
+    else:
+        # Other languages go through the translation service, all fields concurrently under
+        # TRANSLATION_DEADLINE; a late or failing backend answers with English and translation_pending
+        result = translate_response(logic(data), target_lang, text_paths)
+    response = jsonify(result)
+    if result.get('translation_pending'):
+        # Not cached, so a later request picks up the translations once they land
+        RESPONSE_CACHE_STATS['pending'] += 1
+    elif key is not None:
+        RESPONSE_CACHE.set(key, response.get_data())
+    return response
+
+@app.route('/api/recommend/cache_stats', methods=['GET'])
+def api_recommend_cache_stats():
+    return jsonify(dict(RESPONSE_CACHE_STATS, memory=RESPONSE_CACHE.stats()))
+
 @app.route('/recommend_savings_method', methods=['POST'])
 def recommend_savings_method():
-    data = request.get_json()
-    target_lang = data.get('target_lang', 'en')
-    result = recommend_savings_method_logic(data)
-    if target_lang != 'en':
-        result['recommended_method'] = translate_text(result['recommended_method'], target_lang)
-        result['reason'] = translate_text(result['reason'], target_lang)
-    return jsonify(result)
+    return recommend('savings_method', recommend_savings_method_logic, SAVINGS_METHOD_TEXT, request.get_json())
 
 @app.route('/recommend_account_type', methods=['POST'])
 def recommend_account_type():
-    data = request.get_json()
-    target_lang = data.get('target_lang', 'en')
-    result = recommend_account_type_logic(data)
-    if target_lang != 'en':
-        result['recommended_account_type'] = translate_text(result['recommended_account_type'], target_lang)
-    return jsonify(result)
+    return recommend('account_type', recommend_account_type_logic, ACCOUNT_TYPE_TEXT, request.get_json())
 
 @app.route('/recommend_budget', methods=['POST'])
 def recommend_budget():
     data = request.get_json()
     target_lang = data.get('target_lang', 'en')
-    result = recommend_budget_logic(data)
-    if target_lang != 'en':
-        # Translate all text fields
-        result['investment_recommendation']['type'] = translate_text(result['investment_recommendation']['type'], target_lang)
-        result['investment_recommendation']['reason'] = translate_text(result['investment_recommendation']['reason'], target_lang)
-        result['tips'] = [translate_text(tip, target_lang) for tip in result['tips']]
-        result['warnings'] = [translate_text(warning, target_lang) for warning in result['warnings']]
-    return jsonify(result)
+    error = language_error(target_lang)
+    if error:
+        return error
+    if has_catalog(target_lang):
+        return jsonify(recommend_budget_logic(data, target_lang))
+    return jsonify(translate_response(recommend_budget_logic(data), target_lang, BUDGET_TEXT))
 
 @app.route('/recommend_credit_score', methods=['POST'])
 def recommend_credit_score():
+    return recommend('credit_score', recommend_credit_score_logic, CREDIT_SCORE_TEXT, request.get_json())
+
+# Text fields of a sweep response; 'result' is null when the target can't be reached
+CREDIT_SCORE_SWEEP_TEXT = [('score_ranges', '*'), ('base', 'score_range'), ('target', 'score_range')]
+
+@app.route('/recommend_credit_score/sweep', methods=['POST'])
+def recommend_credit_score_sweep():
+    # What-if grid for the credit score simulator: every combination of the swept
+    # factors in one call, plus the fewest changes that reach the target range
+    from credit_score_sweep import sweep_credit_score
     data = request.get_json()
     target_lang = data.get('target_lang', 'en')
-    result = recommend_credit_score_logic(data)
-    if target_lang != 'en':
-        # Translate all text fields
-        result['score_description'] = translate_text(result['score_description'], target_lang)
-        result['score_range'] = translate_text(result['score_range'], target_lang)
-        result['improvement_timeline'] = translate_text(result['improvement_timeline'], target_lang)
-        result['tips'] = [translate_text(tip, target_lang) for tip in result['tips']]
-        result['warnings'] = [translate_text(warning, target_lang) for warning in result['warnings']]
-        result['next_steps'] = [translate_text(step, target_lang) for step in result['next_steps']]
-        # Translate factor statuses
-        for factor in result['factors'].values():
-            factor['status'] = translate_text(factor['status'], target_lang)
-            factor['score_impact'] = translate_text(factor['score_impact'], target_lang)
+    error = language_error(target_lang)
+    if error:
+        return error
+    result = sweep_credit_score(data, target_lang)
+    if 'error' in result:
+        return jsonify(result), 400
+    if not has_catalog(target_lang):
+        paths = CREDIT_SCORE_SWEEP_TEXT + ([('result', 'score_range')] if result['result'] else [])
+        result = translate_response(result, target_lang, paths)
     return jsonify(result)
 
 @app.route('/recommend_insurance', methods=['POST'])
 def recommend_insurance():
-    data = request.get_json()
-    target_lang = data.get('target_lang', 'en')
-    result = recommend_insurance_logic(data)
-    if target_lang != 'en':
-        # Translate all text fields
-        result['coverage']['health_coverage'] = translate_text(result['coverage']['health_coverage'], target_lang)
-        result['coverage']['vehicle_coverage'] = translate_text(result['coverage']['vehicle_coverage'], target_lang)
-        result['coverage_adequacy'] = translate_text(result['coverage_adequacy'], target_lang)
-        result['recommendations'] = [translate_text(rec, target_lang) for rec in result['recommendations']]
-        result['warnings'] = [translate_text(warning, target_lang) for warning in result['warnings']]
-        result['tips'] = [translate_text(tip, target_lang) for tip in result['tips']]
-        result['next_steps'] = [translate_text(step, target_lang) for step in result['next_steps']]
-        # Translate risk assessment
-        for risk in result['risk_assessment'].values():
-            risk = translate_text(risk, target_lang)
-    return jsonify(result)
+    return recommend('insurance', recommend_insurance_logic, INSURANCE_TEXT, request.get_json())
+
+def warm_up():
+    phishing().warm_up_ml_model()
+    for name in ['account_type', 'savings_method', 'credit_score', 'insurance']:
+        rules(name)
+
+def create_app(preload=True):
+    # gunicorn runs 'app:create_app()' once in the master when preload_app is set
+    # (see gunicorn.conf.py), so workers fork with the models already mapped
+    if preload:
+        warm_up()
+    return app
+
+if EAGER_LOAD:
+    warm_up()
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5001))
@@ -1,46 +1,40 @@
-import pandas as pd
-import re
+import argparse
+from feature_store import DATASET_CSV, STORE_DIR, build, load_frame, load_manifest, save_manifest
 
-# List of suspicious keywords
-SUSPICIOUS_KEYWORDS = [
-    'secure', 'account', 'webscr', 'login', 'signin', 'bank', 'verify', 'update',
-    'password', 'confirm', 'paypal', 'wallet', 'support', 'security', 'click',
-    'suspended', 'limited', 'urgent', 'action', 'required'
-]
-# List of known shorteners
-SHORTENERS = ['bit.ly', 'tinyurl.com', 'goo.gl', 't.co', 'ow.ly', 'is.gd', 'buff.ly', 'adf.ly']
+# special_characters, suspicious_keywords_found and shortener_score are columns of
+# the feature store: one .npy per column, row i of each is row i of the dataset
+# (the row id), and a build computes only the rows or columns that are missing.
+# This brings them up to date and can export them as a side file.
+AUGMENT_COLUMNS = ['special_characters', 'suspicious_keywords_found', 'shortener_score']
 
-# Load CSV
-csv_file = 'enhanced_phishing_dataset.csv'
-df = pd.read_csv(csv_file)
+def augment(dataset_csv=DATASET_CSV, store_dir=STORE_DIR, force=False):
+    if force:
+        # Forget the columns' versions so the build recomputes them for every row
+        manifest = load_manifest(store_dir)
+        if manifest['rows']:
+            for name in AUGMENT_COLUMNS:
+                manifest['columns'].pop(name, None)
+            save_manifest(store_dir, manifest)
+    return build(dataset_csv, store_dir)
 
-# If these columns already exist, skip adding them
-for col in ['special_characters', 'suspicious_keywords_found', 'shortener_score']:
-    if col not in df.columns:
-        df[col] = 0
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add URL feature columns to the phishing feature store')
+    parser.add_argument('--dataset', default=DATASET_CSV)
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--force', action='store_true', help='Recompute the columns even if they are current')
+    parser.add_argument('--output', help='Also write the columns, with row_id, to this Parquet file')
+    args = parser.parse_args()
 
-# Try to find the URL column (commonly named 'URL' or similar)
-url_col = None
-for candidate in ['URL', 'Url', 'url', 'link']:
-    if candidate in df.columns:
-        url_col = candidate
-        break
-if url_col is None:
-    raise Exception('Could not find URL column in CSV.')
-
-for idx, row in df.iterrows():
-    url = str(row[url_col])
-    # Count special characters
-    special_chars = len(re.findall(r'[!@#$%^&*(),.?":{}|<>]', url))
-    # Count suspicious keywords
-    suspicious_count = sum(1 for keyword in SUSPICIOUS_KEYWORDS if keyword in url.lower())
-    # Shortener score
-    shortener_score = 0.8 if any(short in url for short in SHORTENERS) else 0
-    df.at[idx, 'special_characters'] = special_chars
-    df.at[idx, 'suspicious_keywords_found'] = suspicious_count
-    df.at[idx, 'shortener_score'] = shortener_score
-
-# Save the updated CSV
-out_file = 'enhanced_phishing_dataset.csv'
-df.to_csv(out_file, index=False)
-print(f'Updated {out_file} with new features.') 
\ No newline at end of file
+    report = augment(args.dataset, args.store, args.force)
+    for name in AUGMENT_COLUMNS:
+        if name in report['recomputed']:
+            print(f'{name}: computed for {report["rows"]} rows')
+        elif name in report['appended']:
+            print(f'{name}: computed for {report["new_rows"]} new rows')
+        else:
+            print(f'{name}: already present, skipping')
+    if args.output:
+        frame = load_frame(AUGMENT_COLUMNS, args.store)
+        frame.insert(0, 'row_id', range(len(frame)))
+        frame.to_parquet(args.output, index=False)
+        print(f'Wrote {len(frame)} rows to {args.output}')
@@ -0,0 +1,59 @@
+import random
+import string
+import time
+from difflib import SequenceMatcher
+from brand_index import BrandIndex, load_brands
+
+# Benchmark the brand index against a linear SequenceMatcher scan at 10k brands
+NUM_BRANDS = 10000
+NUM_QUERIES = 500
+random.seed(42)
+
+def random_brand():
+    syllables = ['ka', 'ra', 'pa', 'ti', 'mo', 'ne', 'su', 'li', 'da', 'vi', 'go', 'sh', 'an', 'bank', 'pay', 'fin', 'ins']
+    return ''.join(random.choice(syllables) for _ in range(random.randint(2, 6)))
+
+def typo(brand):
+    i = random.randrange(len(brand))
+    op = random.choice(['swap', 'drop', 'insert', 'replace'])
+    if op == 'swap' and len(brand) > 1:
+        i = min(i, len(brand) - 2)
+        return brand[:i] + brand[i + 1] + brand[i] + brand[i + 2:]
+    if op == 'drop':
+        return brand[:i] + brand[i + 1:]
+    if op == 'insert':
+        return brand[:i] + random.choice(string.ascii_lowercase) + brand[i:]
+    return brand[:i] + random.choice(string.ascii_lowercase) + brand[i + 1:]
+
+brands = list(dict.fromkeys(load_brands()))
+seen = set(brands)
+while len(brands) < NUM_BRANDS:
+    brand = random_brand()
+    if brand not in seen:
+        seen.add(brand)
+        brands.append(brand)
+
+queries = [typo(random.choice(brands)) for _ in range(NUM_QUERIES // 2)]
+queries += [''.join(random.choice(string.ascii_lowercase) for _ in range(random.randint(4, 14))) for _ in range(NUM_QUERIES // 2)]
+
+start = time.perf_counter()
+index = BrandIndex(brands)
+build_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+linear = [max(SequenceMatcher(None, q, b).ratio() for b in brands) for q in queries]
+linear_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+start = time.perf_counter()
+indexed = [index.best_match(q)[1] for q in queries]
+indexed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+flagged = [i for i, score in enumerate(linear) if score > 0.8]
+agree = sum(1 for i in flagged if indexed[i] > 0.8)
+
+print(f'Brands: {len(index)}, queries: {len(queries)}')
+print(f'Index build:       {build_seconds:.2f} s')
+print(f'Linear scan:       {linear_ms:.3f} ms/query')
+print(f'Brand index:       {indexed_ms:.3f} ms/query ({linear_ms / indexed_ms:.0f}x faster)')
+print(f'Lookalikes (>0.8): {agree}/{len(flagged)} also flagged by the index')
+print(f'Exact best score:  {sum(1 for a, b in zip(linear, indexed) if abs(a - b) < 1e-12)}/{len(queries)} queries')
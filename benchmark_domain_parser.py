@@ -0,0 +1,59 @@
+# benchmark_domain_parser.py
+import argparse
+import random
+import tempfile
+import time
+import tldextract
+from domain_parser import EXTRACTOR, extract_domain, load_extractor, split_hostname
+
+def make_urls(count, hosts, seed=0):
+    # Request-like traffic: many URLs per host, with the awkward shapes users paste
+    rng = random.Random(seed)
+    suffixes = ['com', 'co.in', 'org', 'gov.in', 'xyz', 'co.uk', 'github.io', 'blogspot.com', 'ac.in']
+    host_list = []
+    for i in range(hosts):
+        name = ''.join(rng.choice('abcdefghij') for _ in range(rng.randint(4, 10)))
+        sub = rng.choice(['', 'www.', 'login.', 'secure.account.', 'm.'])
+        host_list.append(f'{sub}{name}.{rng.choice(suffixes)}')
+    host_list += ['192.168.1.10', '[::1]', 'LOGIN.PayPal.COM.', 'xn--pypal-4ve.com', 'пример.рф', 'localhost']
+    templates = [
+        'http://{h}/', 'https://{h}/login?next=/', '{h}', '{h}/path', 'https://user:pw@{h}:8443/x',
+        'HTTP://{h}#frag', '//{h}/a', 'ftp://{h}', 'https://{h}?q=a@b.com'
+    ]
+    return [rng.choice(templates).format(h=rng.choice(host_list)) for _ in range(count)]
+
+def per_url(function, urls):
+    start = time.perf_counter()
+    for url in urls:
+        function(url)
+    return (time.perf_counter() - start) / len(urls)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parse cost per URL: plain tldextract vs the memoized shared extractor')
+    parser.add_argument('--urls', type=int, default=200000)
+    parser.add_argument('--hosts', type=int, default=2000)
+    args = parser.parse_args()
+
+    urls = make_urls(args.urls, args.hosts)
+
+    # Cold start: tldextract's default extractor with an empty cache tries the
+    # network first; the bundled snapshot never does
+    start = time.perf_counter()
+    tldextract.TLDExtract(cache_dir=tempfile.mkdtemp())('example.com')
+    default_cold = time.perf_counter() - start
+    start = time.perf_counter()
+    load_extractor()
+    snapshot_cold = time.perf_counter() - start
+    print(f'cold start: default extractor {default_cold * 1e3:.1f} ms, bundled snapshot {snapshot_cold * 1e3:.1f} ms')
+
+    mismatches = sum(extract_domain(url) != EXTRACTOR(url) for url in urls)
+    print(f'memoized results identical to tldextract on {len(urls)} URLs: {mismatches == 0}')
+
+    split_hostname.cache_clear()
+    uncached = per_url(EXTRACTOR, urls)
+    split_hostname.cache_clear()
+    memoized = per_url(extract_domain, urls)
+    info = split_hostname.cache_info()
+    print(f'per URL ({args.hosts} hosts): tldextract {uncached * 1e6:.2f} us, memoized {memoized * 1e6:.2f} us '
+          f'({uncached / memoized:.1f}x, hit rate {info.hits / (info.hits + info.misses):.3f})')
+    raise SystemExit(0 if mismatches == 0 else 1)
@@ -0,0 +1,72 @@
+# benchmark_forest_engine.py
+import argparse
+import os
+import time
+import numpy as np
+import joblib
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from forest_engine import SKLEARN_ROWS, flatten_forest
+from feature_spec import NUM_MODEL_COLUMNS
+
+def synthetic_forest(kind, n_features, rows=20000, seed=0):
+    # Stand-in when the real pickle isn't around: same shape as train_phishing_model.py
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, n_features)).astype(np.float32)
+    X[:, ::3] = np.round(X[:, ::3] * 3)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=rows)) > 0
+    if kind == 'regressor':
+        return RandomForestRegressor(n_estimators=100, random_state=42).fit(X, y.astype(float) * 100 + X[:, 1]), X
+    return RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y.astype(int)), X
+
+def time_per_call(function, repeat):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+def run(name, model, X, repeat):
+    forest = flatten_forest(model)
+    expected = model.predict_proba(X) if forest.classes_ is not None else model.predict(X)
+    actual = forest.predict_proba(X) if forest.classes_ is not None else forest.predict(X)
+    singles = [forest.predict_proba(X[i:i + 1]) if forest.classes_ is not None else forest.predict(X[i:i + 1]) for i in range(min(500, len(X)))]
+    exact = np.array_equal(expected, actual) and np.array_equal(np.concatenate(singles), expected[:len(singles)])
+    print(f'{name}: {len(forest.roots)} trees, {len(forest.feature)} nodes, max depth {forest.max_depth}')
+    print(f'  identical to sklearn on {len(X)} rows (batch and single-row paths): {exact}')
+    predict = model.predict_proba if forest.classes_ is not None else model.predict
+    fast = forest.predict_proba if forest.classes_ is not None else forest.predict
+    row = X[:1]
+    sklearn_one = time_per_call(lambda: predict(row), repeat)
+    flat_one = time_per_call(lambda: fast(row), repeat)
+    print(f'  single row: sklearn {sklearn_one * 1e3:.3f} ms, flat {flat_one * 1e3:.3f} ms ({sklearn_one / flat_one:.1f}x)')
+    # Small batches (/api/check/batch, micro-batches) walk the flat arrays; from
+    # SKLEARN_ROWS rows on the forest uses sklearn's tree code on rebuilt trees
+    for rows in [10, 100, SKLEARN_ROWS, 1000, 10000]:
+        batch = X[:rows]
+        sklearn_batch = time_per_call(lambda: predict(batch), max(3, repeat // rows))
+        flat_batch = time_per_call(lambda: fast(batch), max(3, repeat // rows))
+        print(f'  {rows} rows: sklearn {sklearn_batch * 1e3:.1f} ms, flat {flat_batch * 1e3:.1f} ms ({sklearn_batch / flat_batch:.1f}x)')
+    return exact
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the flat forest evaluator against sklearn and time both')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    models = [
+        ('phishing_model.pkl', 'classifier', NUM_MODEL_COLUMNS),
+        ('goal_feasibility_model.pkl', 'classifier', 6)
+    ]
+    all_exact = True
+    for path, kind, n_features in models:
+        if os.path.exists(path):
+            model = joblib.load(path)
+            X = np.random.default_rng(1).normal(size=(20000, model.n_features_in_)).astype(np.float32) * 50
+            name = path
+        else:
+            model, X = synthetic_forest(kind, n_features)
+            name = f'{path} (not found, synthetic {n_features}-feature forest)'
+        all_exact &= run(name, model, X, args.repeat)
+    model, X = synthetic_forest('regressor', 4)
+    all_exact &= run('synthetic regressor', model, X, args.repeat)
+    raise SystemExit(0 if all_exact else 1)
@@ -0,0 +1,54 @@
+# benchmark_startup.py
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Heavy modules that `import app` must not load until a request needs them
+LAZY_MODULES = ['phishing_model', 'numpy', 'tldextract', 'whois', 'joblib', 'sklearn', 'asyncio']
+
+def import_app(eager):
+    # Fresh interpreter with -X importtime; returns wall time and {module: (self_us, cumulative_us)}
+    env = dict(os.environ, APP_EAGER_LOAD='1' if eager else '0', PYTHONDONTWRITEBYTECODE='1')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise Exception(f'import app failed:\n{result.stderr[-2000:]}')
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, modules
+
+def report(title, runs, top):
+    wall = min(run[0] for run in runs)
+    modules = runs[-1][1]
+    print(f"{title}: best wall time {wall * 1e3:.0f} ms, 'import app' {modules['app'][1] / 1e3:.0f} ms")
+    # Heaviest imports by cumulative time (nested imports are counted in their parent too)
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][1])[:top]:
+        print(f'  {cumulative_us / 1e3:8.1f} ms  (self {self_us / 1e3:6.1f} ms)  {name}')
+    return modules
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Startup import-time breakdown for app.py (lazy vs eager)')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-ms', type=float, default=None, help="Fail if the lazy 'import app' takes longer")
+    parser.add_argument('--skip-eager', action='store_true')
+    args = parser.parse_args()
+
+    lazy = report('lazy', [import_app(eager=False) for _ in range(args.runs)], args.top)
+    if not args.skip_eager:
+        report('eager (APP_EAGER_LOAD=1)', [import_app(eager=True) for _ in range(args.runs)], args.top)
+
+    failures = [f'{name} is imported at startup' for name in LAZY_MODULES if name in lazy]
+    if args.max_ms is not None and lazy['app'][1] / 1e3 > args.max_ms:
+        failures.append(f"'import app' took {lazy['app'][1] / 1e3:.0f} ms (budget {args.max_ms:.0f} ms)")
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    raise SystemExit(1 if failures else 0)
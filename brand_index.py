@@ -0,0 +1,71 @@
+# brand_index.py
+import os
+from collections import defaultdict
+from difflib import SequenceMatcher
+import numpy as np
+
+DEFAULT_BRANDS = ['paypal', 'google', 'apple', 'amazon', 'bank', 'microsoft']
+BRANDS_FILE = os.environ.get('BRANDS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'brands.txt'))
+# How many of the best bigram candidates get an exact SequenceMatcher score
+MAX_CANDIDATES = int(os.environ.get('BRAND_INDEX_MAX_CANDIDATES', 32))
+
+def bigrams(text):
+    padded = f'^{text}$'
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+class BrandIndex:
+    def __init__(self, brands, max_candidates=MAX_CANDIDATES):
+        self.brands = list(dict.fromkeys(brand.strip().lower() for brand in brands if brand.strip()))
+        self.brand_set = set(self.brands)
+        self.max_candidates = max_candidates
+        postings = defaultdict(list)
+        gram_counts = []
+        for brand_id, brand in enumerate(self.brands):
+            grams = bigrams(brand)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(brand_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.gram_counts = np.array(gram_counts, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.brands)
+
+    def candidates(self, name):
+        # Only brands sharing at least one bigram with the name are touched
+        grams = bigrams(name)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        brand_ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+        dice = 2 * shared / (self.gram_counts[brand_ids] + len(grams))
+        order = np.argsort(-dice, kind='stable')[:self.max_candidates]
+        return brand_ids[order]
+
+    def best_match(self, name):
+        name = name.lower()
+        if name in self.brand_set:
+            return name, 1.0
+        best_brand, best_score = '', 0.0
+        for brand_id in self.candidates(name):
+            brand = self.brands[brand_id]
+            matcher = SequenceMatcher(None, name, brand)
+            if matcher.real_quick_ratio() <= best_score or matcher.quick_ratio() <= best_score:
+                continue
+            score = matcher.ratio()
+            if score > best_score:
+                best_brand, best_score = brand, score
+        return best_brand, best_score
+
+def load_brands(path=BRANDS_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            brands = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    except OSError:
+        brands = []
+    return brands or DEFAULT_BRANDS
+
+def load_brand_index(path=BRANDS_FILE):
+    return BrandIndex(load_brands(path))
+
+BRAND_INDEX = load_brand_index()
@@ -1,6 +1,8 @@
 # budget_model.py
+from rule_messages import messages_for
 
-def recommend_budget_logic(data):
+def recommend_budget_logic(data, lang='en'):
+    t = messages_for(lang)
     # Extract user inputs
     monthly_income = float(data.get('monthlyIncome', 0))
     monthly_expenses = float(data.get('monthlyExpenses', 0))
@@ -45,33 +47,33 @@ def recommend_budget_logic(data):
     
     # Investment recommendations based on goal and timeframe
     if savings_goal == 'Emergency Fund':
-        investment_type = 'Savings Account'
-        investment_reason = 'High liquidity for emergency access'
+        investment_type = t('productSavingsAccount')
+        investment_reason = t('budgetReasonLiquidity')
     elif savings_goal == 'Vacation' and time_frame == '3 months':
-        investment_type = 'Savings Account'
-        investment_reason = 'Short-term goal, need liquidity'
+        investment_type = t('productSavingsAccount')
+        investment_reason = t('budgetReasonShortTerm')
     elif savings_goal == 'House' or time_frame == '1 year':
-        investment_type = 'Fixed Deposit (FD)'
-        investment_reason = 'Better returns for medium-term goals'
+        investment_type = t('productFixedDeposit')
+        investment_reason = t('budgetReasonMediumTerm')
     else:
-        investment_type = 'Recurring Deposit (RD)'
-        investment_reason = 'Regular savings with good returns'
+        investment_type = t('productRecurringDeposit')
+        investment_reason = t('budgetReasonRegular')
     
     # Generate tips and warnings
     tips = []
     warnings = []
     
     if savings_rate < 20:
-        warnings.append('Your savings rate is low. Consider reducing expenses.')
+        warnings.append(t('budgetWarningLowSavingsRate'))
     if monthly_expenses > monthly_income * 0.8:
-        warnings.append('Your expenses are very high relative to income.')
+        warnings.append(t('budgetWarningHighExpenses'))
     if disposable_income < 5000:
-        warnings.append('Limited disposable income. Focus on essential expenses.')
+        warnings.append(t('budgetWarningLowDisposable'))
     
     if savings_rate > 30:
-        tips.append('Great savings rate! Consider investing excess funds.')
+        tips.append(t('budgetTipInvestExcess'))
     if monthly_expenses < monthly_income * 0.5:
-        tips.append('Excellent expense management. You can save more aggressively.')
+        tips.append(t('budgetTipSaveAggressively'))
     
     return {
         'recommended_savings': round(recommended_savings, 2),
@@ -0,0 +1,86 @@
+# build_message_catalogs.py
+import argparse
+import glob
+import json
+import os
+import re
+
+# Source catalogs are ARB files (same format and locales as the Flutter app's
+# lib/l10n), one per language: messages/rules_<lang>.arb. The build merges each
+# language over English, checks placeholders, and writes a flat
+# {message_id: text} table per language to messages/compiled/.
+MESSAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'messages')
+COMPILED_DIR = os.path.join(MESSAGES_DIR, 'compiled')
+SOURCE_LOCALE = 'en'
+
+def read_arb(path):
+    with open(path, encoding='utf-8') as f:
+        arb = json.load(f)
+    # Keys starting with @ are ARB metadata (@@locale, @id descriptions/placeholders)
+    return {key: text for key, text in arb.items() if not key.startswith('@')}
+
+def placeholders(text):
+    return set(re.findall(r'\{(\w+)\}', text))
+
+def compile_catalogs(messages_dir=MESSAGES_DIR):
+    sources = {}
+    for path in sorted(glob.glob(os.path.join(messages_dir, 'rules_*.arb'))):
+        lang = os.path.basename(path)[len('rules_'):-len('.arb')]
+        sources[lang] = read_arb(path)
+    if SOURCE_LOCALE not in sources:
+        raise Exception(f'{messages_dir} has no rules_{SOURCE_LOCALE}.arb')
+    english = sources[SOURCE_LOCALE]
+    catalogs, problems = {}, []
+    for lang, messages in sources.items():
+        for message_id in sorted(set(messages) - set(english)):
+            problems.append(f'{lang}: {message_id} is not in rules_{SOURCE_LOCALE}.arb')
+        for message_id, text in messages.items():
+            if message_id in english and placeholders(text) != placeholders(english[message_id]):
+                problems.append(f'{lang}: {message_id} placeholders {sorted(placeholders(text))} '
+                                f'!= {sorted(placeholders(english[message_id]))}')
+        missing = sorted(set(english) - set(messages))
+        if missing:
+            # Untranslated messages fall back to English rather than failing the build
+            print(f'warning: {lang} is missing {len(missing)} messages: {", ".join(missing)}')
+        catalogs[lang] = {message_id: messages.get(message_id, text) for message_id, text in english.items()}
+    if problems:
+        raise Exception('invalid message catalogs:\n  ' + '\n  '.join(problems))
+    return catalogs
+
+def render(catalog):
+    return json.dumps(catalog, ensure_ascii=False, indent=0, sort_keys=True) + '\n'
+
+def write_catalogs(catalogs, compiled_dir=COMPILED_DIR):
+    os.makedirs(compiled_dir, exist_ok=True)
+    for lang, catalog in catalogs.items():
+        path = os.path.join(compiled_dir, f'rules_{lang}.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(render(catalog))
+        os.replace(path + '.tmp', path)
+
+def stale_catalogs(catalogs, compiled_dir=COMPILED_DIR):
+    stale = []
+    for lang, catalog in catalogs.items():
+        path = os.path.join(compiled_dir, f'rules_{lang}.json')
+        try:
+            with open(path, encoding='utf-8') as f:
+                if f.read() == render(catalog):
+                    continue
+        except FileNotFoundError:
+            pass
+        stale.append(path)
+    return stale
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile messages/rules_<lang>.arb into lookup tables')
+    parser.add_argument('--check', action='store_true', help='Fail if the compiled catalogs are out of date')
+    args = parser.parse_args()
+
+    catalogs = compile_catalogs()
+    if args.check:
+        stale = stale_catalogs(catalogs)
+        for path in stale:
+            print(f'FAIL: {path} is out of date, run python build_message_catalogs.py')
+        raise SystemExit(1 if stale else 0)
+    write_catalogs(catalogs)
+    print(f'Compiled {len(catalogs[SOURCE_LOCALE])} messages for {", ".join(sorted(catalogs))} into {COMPILED_DIR}')
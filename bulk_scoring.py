@@ -0,0 +1,171 @@
+# bulk_scoring.py
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from rule_engine import get_rules
+
+# Rule sets scored for a portfolio, and the rows held in memory at a time
+BULK_RULE_SETS = ['budget', 'credit_score', 'insurance']
+CHUNK_ROWS = int(os.environ.get('BULK_CHUNK_ROWS', 25000))
+
+def read_chunks(source, chunk_rows=CHUNK_ROWS):
+    # A DataFrame, or a CSV/Parquet path, as DataFrames of at most chunk_rows rows
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_rows):
+            yield source.iloc[start:start + chunk_rows].reset_index(drop=True)
+    elif str(source).endswith(('.parquet', '.pq')):
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        # Only empty cells are missing: 'None' is an existingInsurance option, not NaN
+        yield from pd.read_csv(source, chunksize=chunk_rows, low_memory=False, keep_default_na=False, na_values=[''])
+
+def input_columns(frame, rules):
+    # Request fields for one rule set; empty cells get the same default as a missing field
+    columns = {}
+    for spec in rules.inputs.values():
+        if spec['field'] in frame:
+            values = frame[spec['field']]
+            if spec.get('default') is not None and values.isna().any():
+                values = values.fillna(spec['default'])
+            columns[spec['field']] = values.to_numpy()
+    return columns
+
+def score_frame(frame, rule_sets=BULK_RULE_SETS, lang='en'):
+    # One output column per response field, named <rule set>.<path>
+    # (credit_score.factors.credit_age.status); tips and other lists stay lists
+    out = {}
+    for name in rule_sets:
+        rules = get_rules(name)
+        for path, values in rules.evaluate_columns(input_columns(frame, rules), lang, n=len(frame)).items():
+            out[f'{name}.{path}'] = values
+    return pd.DataFrame(out)
+
+def score_chunks(source, rule_sets=BULK_RULE_SETS, lang='en', chunk_rows=CHUNK_ROWS, keep=None):
+    # Scored chunks, with the input columns in keep (all of them if None) in front
+    for chunk in read_chunks(source, chunk_rows):
+        scored = score_frame(chunk, rule_sets, lang)
+        kept = chunk if keep is None else chunk[list(keep)]
+        yield pd.concat([kept.reset_index(drop=True), scored], axis=1)
+
+def list_columns(frame):
+    return [column for column in frame if frame[column].dtype == object and len(frame) and isinstance(frame[column].iat[0], list)]
+
+def fixed_schema(frame, lists=()):
+    # Schema of the whole file, taken from its first chunk: lists are list<string>
+    # and all-null columns are strings, so later chunks can't drift to another type
+    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+    for i, field in enumerate(schema):
+        if field.name in lists or pa.types.is_list(field.type):
+            schema = schema.set(i, pa.field(field.name, pa.list_(pa.string())))
+        elif pa.types.is_null(field.type):
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    return schema
+
+class CsvSink:
+    # Lists are written as JSON arrays so texts containing commas or | survive
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, frame):
+        for column in list_columns(frame):
+            # Rows with the same texts share one list object, so encode each once
+            encoded = {}
+            frame[column] = [encoded.get(id(items)) or encoded.setdefault(id(items), json.dumps(items, ensure_ascii=False))
+                             for items in frame[column]]
+        if self.writer is None:
+            self.schema = fixed_schema(frame)
+            self.writer = pacsv.CSVWriter(self.path + '.tmp', self.schema)
+        self.writer.write_table(pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.path + '.tmp', self.path)
+
+class ParquetSink:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path + '.tmp', fixed_schema(frame, set(list_columns(frame))))
+        self.writer.write_table(pa.Table.from_pandas(frame, schema=self.writer.schema, preserve_index=False))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.path + '.tmp', self.path)
+
+def score_file(source, destination, rule_sets=BULK_RULE_SETS, lang='en', chunk_rows=CHUNK_ROWS, keep=None):
+    # Streams source through the rules into a CSV or Parquet file (by extension);
+    # memory stays at about one chunk whatever the portfolio size
+    sink = ParquetSink(destination) if destination.endswith(('.parquet', '.pq')) else CsvSink(destination)
+    rows = 0
+    for scored in score_chunks(source, rule_sets, lang, chunk_rows, keep):
+        sink.write(scored)
+        rows += len(scored)
+    sink.close()
+    return rows
+
+def make_portfolio(rows, seed=0):
+    # Synthetic customers with every input the bulk rule sets read
+    rng = np.random.default_rng(seed)
+    income = rng.lognormal(10.8, 0.7, rows).round(2)
+    return pd.DataFrame({
+        'customer_id': np.arange(rows),
+        'monthlyIncome': income,
+        'monthlyExpenses': (income * rng.uniform(0.3, 1.1, rows)).round(2),
+        'savingsGoal': rng.choice(['Emergency Fund', 'Vacation', 'House', 'Retirement'], rows),
+        'timeFrame': rng.choice(['3 months', '6 months', '1 year', '5 years'], rows),
+        'paymentHistory': rng.choice(['Excellent', 'Good', 'Fair', 'Poor'], rows),
+        'creditUtilization': rng.uniform(0, 100, rows).round(1),
+        'creditAge': rng.integers(0, 25, rows),
+        'creditMix': rng.choice(['Mixed', 'Credit Cards', 'Loans'], rows),
+        'newCredit': rng.integers(0, 6, rows),
+        'income': income * 12,
+        'age': rng.integers(18, 80, rows),
+        'healthCondition': rng.choice(['Excellent', 'Good', 'Fair', 'Poor'], rows),
+        'occupation': rng.choice(['Office', 'Manual', 'High Risk', 'Professional'], rows),
+        'familySize': rng.integers(1, 8, rows),
+        'existingInsurance': rng.choice(['None', 'Basic', 'Comprehensive'], rows),
+        'vehicleType': rng.choice(['Car', 'Bike', 'Commercial'], rows),
+        'vehicleAge': rng.integers(0, 20, rows),
+        'drivingHistory': rng.choice(['Excellent', 'Good', 'Fair', 'Poor'], rows)
+    })
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a portfolio (CSV or Parquet) with the budget, credit score and insurance rules')
+    parser.add_argument('input', nargs='?', help='CSV or Parquet file with one customer per row, columns named like the API fields')
+    parser.add_argument('output', nargs='?', help='CSV or Parquet file to write (by extension)')
+    parser.add_argument('--rules', nargs='+', default=BULK_RULE_SETS, choices=['account_type', 'savings_method', 'budget', 'credit_score', 'insurance'])
+    parser.add_argument('--lang', default='en', help='Language of the text columns (en, hi, pa)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--keep', nargs='*', default=None, help='Input columns to copy to the output (default: all)')
+    parser.add_argument('--synthetic', type=int, default=0, help='Write a synthetic portfolio of this many rows to input first')
+    args = parser.parse_args()
+    if not args.input or (not args.output and not args.synthetic):
+        parser.error('input and output are required')
+
+    if args.synthetic:
+        portfolio = make_portfolio(args.synthetic)
+        if args.input.endswith(('.parquet', '.pq')):
+            portfolio.to_parquet(args.input, index=False)
+        else:
+            portfolio.to_csv(args.input, index=False)
+        print(f'Wrote {args.synthetic} synthetic rows to {args.input}')
+        if not args.output:
+            raise SystemExit(0)
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, args.rules, args.lang, args.chunk_rows, args.keep)
+    elapsed = time.perf_counter() - start
+    print(f'Scored {rows} rows into {args.output} in {elapsed:.1f} s ({rows / elapsed * 60:,.0f} rows/min)')
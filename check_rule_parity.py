@@ -0,0 +1,124 @@
+# check_rule_parity.py
+import argparse
+import itertools
+import random
+import time
+import numpy as np
+from account_type_model import recommend_account_type_logic
+from budget_model import recommend_budget_logic
+from credit_score_model import recommend_credit_score_logic
+from insurance_model import recommend_insurance_logic
+from rule_engine import get_rules
+from rule_messages import LOCALES
+from savings_method_model import recommend_savings_method_logic
+
+RULE_SETS = {
+    'account_type': recommend_account_type_logic,
+    'savings_method': recommend_savings_method_logic,
+    'budget': recommend_budget_logic,
+    'credit_score': recommend_credit_score_logic,
+    'insurance': recommend_insurance_logic
+}
+
+# Field left out of the request, so the default applies
+MISSING = object()
+
+# Values for inputs that are only compared through derived values (savings rate,
+# premium vs income, ...), on top of the thresholds found in the rules
+EXTRA_VALUES = {
+    'monthlyIncome': [0, 8000, 25000, 29999.99, 42000, 99999.5, 180000],
+    'monthlyExpenses': [0, 4000, 12500, 20000, 33600, 40000, 80000, 150000],
+    'income': [0, 12000, 35000, 49999.99, 50000.01, 120000, 1e7],
+    'amount': [0, 50000]
+}
+
+def input_values(rules, name, spec):
+    # Every threshold the rules use on this input (and either side of it), every
+    # option they name, an unknown option and the default
+    values = [MISSING]
+    for decision in rules.decisions():
+        for threshold in decision.thresholds.get(name, []):
+            step = 1 if spec['type'] == 'int' else 0.5
+            values += [threshold - step, threshold, threshold + step]
+        values += decision.options.get(name, [])
+    if spec['type'] == 'option':
+        values += ['Other', None]
+    else:
+        values += [spec.get('default', 0)] + EXTRA_VALUES.get(spec['field'], [])
+    if spec['type'] == 'int':
+        values = [int(v) if v is not MISSING else v for v in values]
+    unique = []
+    for value in values:
+        if not any(value is u or (value == u and type(value) is type(u)) for u in unique):
+            unique.append(value)
+    return unique
+
+def make_grid(rules, limit, seed=0):
+    fields = [spec['field'] for spec in rules.inputs.values()]
+    choices = [input_values(rules, name, spec) for name, spec in rules.inputs.items()]
+    size = int(np.prod([len(c) for c in choices]))
+    if size <= limit:
+        points = itertools.product(*choices)
+    else:
+        rng = random.Random(seed)
+        points = [tuple(rng.choice(c) for c in choices) for _ in range(limit)]
+    grid = [{field: value for field, value in zip(fields, point) if value is not MISSING} for point in points]
+    return grid, size
+
+def flatten(response, path='', out=None):
+    out = {} if out is None else out
+    for key, value in response.items():
+        if isinstance(value, dict):
+            flatten(value, f'{path}{key}.', out)
+        else:
+            out[path + key] = value
+    return out
+
+def same(a, b):
+    return type(a) is type(b) and a == b
+
+def same_response(a, b):
+    return a == b and all(same(x, y) for x, y in zip(flatten(a).values(), flatten(b).values()))
+
+def check(name, limit):
+    logic, rules = RULE_SETS[name], get_rules(name)
+    grid, size = make_grid(rules, limit)
+    mismatches = []
+    for lang in LOCALES:
+        for data in grid:
+            expected, actual = logic(data, lang), rules.evaluate(data, lang)
+            if not same_response(expected, actual):
+                mismatches.append(('scalar', lang, data))
+    # Columns: a missing field is the same as sending the default
+    columns = {spec['field']: [data.get(spec['field'], spec.get('default')) for data in grid] for spec in rules.inputs.values()}
+    for lang in LOCALES:
+        start = time.perf_counter()
+        out = rules.evaluate_columns(columns, lang)
+        elapsed = time.perf_counter() - start
+        for i, data in enumerate(grid):
+            expected = flatten(logic(data, lang))
+            if any(not (out[path][i] == value) for path, value in expected.items()):
+                mismatches.append(('columns', lang, data))
+    # Inputs with the same cache key must get the same response
+    keys = {}
+    for data in grid:
+        key = rules.cache_key(data)
+        if key is None:
+            continue
+        first = keys.setdefault(key, data)
+        if first is not data and any(not same_response(logic(first, lang), logic(data, lang)) for lang in LOCALES):
+            mismatches.append(('cache_key', 'all', data))
+    print(f'{name}: {len(grid)} inputs (grid of {size}) x {len(LOCALES)} languages, '
+          f'{len(mismatches)} mismatches, columns {len(grid) / elapsed:,.0f} rows/s, {len(keys)} cache keys')
+    for kind, lang, data in mismatches[:5]:
+        print(f'  {kind} {lang}: {data}')
+    return not mismatches
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the compiled rules in rules/ against the recommend_*_logic functions')
+    parser.add_argument('names', nargs='*', default=list(RULE_SETS))
+    parser.add_argument('--limit', type=int, default=50000, help='Sample this many points from larger grids')
+    args = parser.parse_args()
+
+    results = [check(name, args.limit) for name in args.names]
+    raise SystemExit(0 if all(results) else 1)
@@ -1,6 +1,12 @@
 # credit_score_model.py
+from rule_messages import messages_for, option_text
 
-def recommend_credit_score_logic(data):
+# Input options echoed back in 'factors' and the message ids that localize them
+PAYMENT_HISTORY_MESSAGES = {'Excellent': 'levelExcellent', 'Good': 'levelGood', 'Fair': 'levelFair', 'Poor': 'levelPoor'}
+CREDIT_MIX_MESSAGES = {'Mixed': 'creditMixMixed', 'Credit Cards': 'creditMixCreditCards', 'Loans': 'creditMixLoans'}
+
+def recommend_credit_score_logic(data, lang='en'):
+    t = messages_for(lang)
     # Extract user inputs
     payment_history = data.get('paymentHistory', 'Good')  # Excellent, Good, Fair, Poor
     credit_utilization = float(data.get('creditUtilization', 30))  # Percentage
@@ -77,20 +83,20 @@ def recommend_credit_score_logic(data):
     
     # Determine credit score range
     if credit_score >= 750:
-        score_range = 'Excellent'
-        score_description = 'Excellent credit score. You qualify for the best rates and terms.'
+        score_range = t('levelExcellent')
+        score_description = t('creditDescExcellent')
     elif credit_score >= 700:
-        score_range = 'Good'
-        score_description = 'Good credit score. You qualify for most loans and credit cards.'
+        score_range = t('levelGood')
+        score_description = t('creditDescGood')
     elif credit_score >= 650:
-        score_range = 'Fair'
-        score_description = 'Fair credit score. You may qualify for some loans but with higher rates.'
+        score_range = t('levelFair')
+        score_description = t('creditDescFair')
     elif credit_score >= 600:
-        score_range = 'Poor'
-        score_description = 'Poor credit score. You may have difficulty getting approved for loans.'
+        score_range = t('levelPoor')
+        score_description = t('creditDescPoor')
     else:
-        score_range = 'Very Poor'
-        score_description = 'Very poor credit score. Focus on improving your credit before applying for loans.'
+        score_range = t('levelVeryPoor')
+        score_description = t('creditDescVeryPoor')
     
     # Generate improvement tips
     tips = []
@@ -98,39 +104,39 @@ def recommend_credit_score_logic(data):
     
     # Payment history tips
     if payment_history in ['Fair', 'Poor']:
-        warnings.append('Late payments significantly hurt your credit score. Pay all bills on time.')
-        tips.append('Set up automatic payments to avoid late payments.')
+        warnings.append(t('creditWarningLatePayments'))
+        tips.append(t('creditTipAutoPay'))
     
     # Credit utilization tips
     if credit_utilization > 70:
-        warnings.append('Your credit utilization is very high. This hurts your credit score.')
-        tips.append('Keep credit utilization below 30% for better scores.')
+        warnings.append(t('creditWarningVeryHighUtilization'))
+        tips.append(t('creditTipUtilizationBelow30'))
     elif credit_utilization > 50:
-        warnings.append('Your credit utilization is high. Consider paying down balances.')
-        tips.append('Aim to keep credit utilization below 30%.')
+        warnings.append(t('creditWarningHighUtilization'))
+        tips.append(t('creditTipAimUtilization'))
     
     # Credit age tips
     if credit_age < 3:
-        tips.append('Keep old accounts open to build credit history length.')
-        warnings.append('Your credit history is short. Time will help improve your score.')
+        tips.append(t('creditTipKeepOldAccounts'))
+        warnings.append(t('creditWarningShortHistory'))
     
     # New credit tips
     if new_credit > 3:
-        warnings.append('Too many new credit applications can hurt your score.')
-        tips.append('Limit new credit applications to avoid multiple hard inquiries.')
+        warnings.append(t('creditWarningTooManyApplications'))
+        tips.append(t('creditTipLimitApplications'))
     
     # Credit mix tips
     if credit_mix == 'Credit Cards':
-        tips.append('Consider adding a small loan to diversify your credit mix.')
+        tips.append(t('creditTipAddLoan'))
     
     # Income-based tips
     if income < 30000:
-        tips.append('Consider increasing your income to improve creditworthiness.')
+        tips.append(t('creditTipIncreaseIncome'))
     
     # General tips
     if credit_score < 700:
-        tips.append('Monitor your credit report regularly for errors.')
-        tips.append('Consider a secured credit card to build credit.')
+        tips.append(t('creditTipMonitorReport'))
+        tips.append(t('creditTipSecuredCard'))
     
     return {
         'credit_score': credit_score,
@@ -139,37 +145,37 @@ def recommend_credit_score_logic(data):
         'factors': {
             'payment_history': {
                 'impact': '35%',
-                'status': payment_history,
-                'score_impact': 'High' if payment_history in ['Excellent', 'Good'] else 'Low'
+                'status': option_text(t, payment_history, PAYMENT_HISTORY_MESSAGES),
+                'score_impact': t('levelHigh') if payment_history in ['Excellent', 'Good'] else t('levelLow')
             },
             'credit_utilization': {
                 'impact': '30%',
-                'status': f'{credit_utilization}%',
-                'score_impact': 'Good' if credit_utilization < 30 else 'Poor'
+                'status': t('statusPercent', value=credit_utilization),
+                'score_impact': t('levelGood') if credit_utilization < 30 else t('levelPoor')
             },
             'credit_age': {
                 'impact': '15%',
-                'status': f'{credit_age} years',
-                'score_impact': 'Good' if credit_age >= 5 else 'Poor'
+                'status': t('statusYears', years=credit_age),
+                'score_impact': t('levelGood') if credit_age >= 5 else t('levelPoor')
             },
             'credit_mix': {
                 'impact': '10%',
-                'status': credit_mix,
-                'score_impact': 'Good' if credit_mix == 'Mixed' else 'Fair'
+                'status': option_text(t, credit_mix, CREDIT_MIX_MESSAGES),
+                'score_impact': t('levelGood') if credit_mix == 'Mixed' else t('levelFair')
             },
             'new_credit': {
                 'impact': '10%',
-                'status': f'{new_credit} new accounts',
-                'score_impact': 'Good' if new_credit <= 1 else 'Poor'
+                'status': t('statusNewAccounts', count=new_credit),
+                'score_impact': t('levelGood') if new_credit <= 1 else t('levelPoor')
             }
         },
         'tips': tips,
         'warnings': warnings,
-        'improvement_timeline': '3-6 months for significant improvement',
+        'improvement_timeline': t('creditImprovementTimeline'),
         'next_steps': [
-            'Pay all bills on time',
-            'Reduce credit card balances',
-            'Avoid new credit applications',
-            'Monitor credit report regularly'
+            t('creditStepPayOnTime'),
+            t('creditStepReduceBalances'),
+            t('creditStepAvoidNewCredit'),
+            t('creditStepMonitorReport')
         ]
     } 
\ No newline at end of file
@@ -0,0 +1,125 @@
+# credit_score_sweep.py
+import os
+import numpy as np
+from rule_engine import get_rules
+from rule_messages import messages_for
+
+# Largest grid a single sweep may ask for
+SWEEP_MAX_POINTS = int(os.environ.get('SWEEP_MAX_POINTS', 100000))
+
+# Swept request fields, in grid axis order
+SWEEP_FIELDS = ['paymentHistory', 'creditUtilization', 'creditAge', 'newCredit']
+
+# Lowest score of each score range, best first, as in recommend_credit_score_logic
+SCORE_RANGES = [('Excellent', 750, 'levelExcellent'), ('Good', 700, 'levelGood'), ('Fair', 650, 'levelFair'),
+                ('Poor', 600, 'levelPoor'), ('Very Poor', 300, 'levelVeryPoor')]
+
+# How far apart payment histories are when sizing a change; anything else scores as Poor
+PAYMENT_HISTORY_RANKS = {'Poor': 0, 'Fair': 1, 'Good': 2, 'Excellent': 3}
+
+def score_range(score):
+    return next((r for r in SCORE_RANGES if score >= r[1]), SCORE_RANGES[-1])
+
+def sweep_axis(field, spec, base, kind):
+    # A list of values, or {min, max, step}; the base value is always on the axis
+    # so that "leave this factor alone" is one of the options
+    if spec is None:
+        values = []
+    elif isinstance(spec, list):
+        values = list(spec)
+    elif isinstance(spec, dict) and kind != 'option':
+        start, stop, step = float(spec.get('min', base)), float(spec.get('max', base)), float(spec.get('step', 1))
+        if step <= 0 or stop < start:
+            raise ValueError(f'{field}: need min <= max and step > 0')
+        if (stop - start) / step >= SWEEP_MAX_POINTS:
+            raise ValueError(f'{field}: too many values (max {SWEEP_MAX_POINTS})')
+        values = np.arange(start, stop + step / 2, step).round(6).tolist()
+    else:
+        raise ValueError(f'{field}: expected a list of values' + (' or {min, max, step}' if kind != 'option' else ''))
+    if kind == 'option':
+        return list(dict.fromkeys([base] + values))
+    values = [int(value) if kind == 'int' else float(value) for value in values] + [base]
+    if not np.isfinite(values).all():
+        raise ValueError(f'{field}: values must be finite numbers')
+    return sorted(set(values))
+
+def sweep_credit_score(data, lang='en'):
+    # Credit score for every combination of the swept factors, with everything else
+    # from the base profile (the same body /recommend_credit_score takes), and the
+    # fewest factor changes that reach the target score range
+    rules = get_rules('credit_score')
+    t = messages_for(lang)
+    names = {spec['field']: name for name, spec in rules.inputs.items()}
+    try:
+        base = rules.read_inputs(data)
+        sweep = data.get('sweep') or {}
+        if not isinstance(sweep, dict) or set(sweep) - set(SWEEP_FIELDS):
+            raise ValueError(f'sweep takes {", ".join(SWEEP_FIELDS)}')
+        axes = [sweep_axis(field, sweep.get(field), base[names[field]], rules.inputs[names[field]]['type'])
+                for field in SWEEP_FIELDS]
+    except (TypeError, ValueError) as e:
+        return {'error': str(e)}
+    shape = tuple(len(axis) for axis in axes)
+    points = int(np.prod(shape))
+    if points > SWEEP_MAX_POINTS:
+        return {'error': f'Sweep of {points} points is too large (max {SWEEP_MAX_POINTS})'}
+
+    # One axis per swept field, broadcast against the others by the rule engine
+    columns = {spec['field']: base[name] for name, spec in rules.inputs.items()}
+    for i, (field, axis) in enumerate(zip(SWEEP_FIELDS, axes)):
+        column = np.array(axis, dtype=object if field == 'paymentHistory' else None)
+        columns[field] = column.reshape([-1 if j == i else 1 for j in range(len(axes))])
+    scores = rules.evaluate_columns(columns, lang, n=shape, paths=('credit_score',))['credit_score']
+
+    base_index = tuple(axis.index(base[names[field]]) for field, axis in zip(SWEEP_FIELDS, axes))
+    base_score = int(scores[base_index])
+    # target is a score range name or a minimum score; by default one range up
+    # from where the profile is now
+    target = data.get('target')
+    if target is None:
+        target_score = SCORE_RANGES[max(SCORE_RANGES.index(score_range(base_score)) - 1, 0)][1]
+    elif isinstance(target, str):
+        target_score = next((low for name, low, _ in SCORE_RANGES if name.lower() == target.lower()), None)
+        if target_score is None:
+            return {'error': f'target must be a score or one of {", ".join(name for name, _, _ in SCORE_RANGES)}'}
+    elif isinstance(target, (int, float)) and not isinstance(target, bool) and np.isfinite(target):
+        target_score = target
+    else:
+        return {'error': 'target must be a score or a score range'}
+
+    # Fewest changed factors first, then the smallest moves (each axis scaled to
+    # its range), then the highest score
+    reached = np.flatnonzero(scores.ravel() >= target_score)
+    best = None
+    if len(reached):
+        at = np.unravel_index(reached, shape)
+        changed = np.zeros(len(reached), dtype=np.int64)
+        distance = np.zeros(len(reached))
+        for i, (field, axis) in enumerate(zip(SWEEP_FIELDS, axes)):
+            if field == 'paymentHistory':
+                values = np.array([PAYMENT_HISTORY_RANKS.get(value, 0) for value in axis], dtype=np.float64)
+            else:
+                values = np.array(axis, dtype=np.float64)
+            span = values.max() - values.min()
+            changed += at[i] != base_index[i]
+            distance += np.abs(values[at[i]] - values[base_index[i]]) / (span if span > 0 else 1)
+        order = np.lexsort((-scores.ravel()[reached], distance, changed))
+        best = tuple(int(index[order[0]]) for index in at)
+
+    result = {
+        'axes': dict(zip(SWEEP_FIELDS, axes)),
+        'scores': scores.tolist(),
+        'points': points,
+        'score_ranges': {str(low): t(message_id) for _, low, message_id in SCORE_RANGES},
+        'base': {'credit_score': base_score, 'score_range': t(score_range(base_score)[2])},
+        'target': {'min_score': target_score, 'score_range': t(score_range(target_score)[2])},
+        'reachable': best is not None,
+        'changes': None,
+        'result': None
+    }
+    if best is not None:
+        score = int(scores[best])
+        result['changes'] = {field: {'from': axis[base_index[i]], 'to': axis[best[i]]}
+                             for i, (field, axis) in enumerate(zip(SWEEP_FIELDS, axes)) if best[i] != base_index[i]}
+        result['result'] = {'credit_score': score, 'score_range': t(score_range(score)[2])}
+    return result
@@ -0,0 +1,78 @@
+# domain_parser.py
+import argparse
+import functools
+import os
+import pathlib
+import urllib.request
+import tldextract
+from tldextract.remote import lenient_netloc
+
+# Public suffix list snapshot shipped with the repo, so hostname parsing never
+# touches the network (tldextract's default fetches the list on first use).
+# Refresh it with `python domain_parser.py --update` and commit the result.
+PUBLIC_SUFFIX_LIST = os.environ.get('PUBLIC_SUFFIX_LIST', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public_suffix_list.dat'))
+PUBLIC_SUFFIX_URL = 'https://publicsuffix.org/list/public_suffix_list.dat'
+HOSTNAME_CACHE_SIZE = int(os.environ.get('HOSTNAME_CACHE_SIZE', 65536))
+
+def load_extractor(path=PUBLIC_SUFFIX_LIST):
+    # No cache_dir: nothing is written to disk. If the snapshot is missing we fall
+    # back to the copy bundled with tldextract, which is also offline.
+    extractor = tldextract.TLDExtract(suffix_list_urls=(pathlib.Path(path).resolve().as_uri(),), cache_dir=None, fallback_to_snapshot=True)
+    # Parse the list now rather than on the first request
+    extractor('example.com')
+    return extractor
+
+EXTRACTOR = load_extractor()
+
+@functools.lru_cache(maxsize=HOSTNAME_CACHE_SIZE)
+def split_hostname(hostname):
+    # hostname -> ExtractResult(subdomain, domain, suffix)
+    return EXTRACTOR(hostname)
+
+def extract_domain(url):
+    # Same result as tldextract.extract(url); tldextract only looks at the host,
+    # so the memo is keyed on it and shared by every URL on that host
+    return split_hostname(lenient_netloc(url))
+
+def normalize_url(url):
+    if not url.startswith(('http://', 'https://')):
+        url = 'http://' + url
+    return url
+
+def url_lengths(url):
+    # URLLength and DomainLength of a normalized URL; serving and the training
+    # feature store both use this, so the model sees the same values in each
+    return len(url), len(extract_domain(url).domain)
+
+def hostname_cache_stats():
+    info = split_hostname.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0
+    }
+
+def update_snapshot(path=PUBLIC_SUFFIX_LIST, url=PUBLIC_SUFFIX_URL):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        data = response.read()
+    if b'===BEGIN ICANN DOMAINS===' not in data:
+        raise Exception(f'{url} did not return a public suffix list')
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+    return len(data)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage the bundled public suffix list snapshot')
+    parser.add_argument('--update', action='store_true', help=f'Download a fresh snapshot from {PUBLIC_SUFFIX_URL}')
+    args = parser.parse_args()
+
+    if args.update:
+        print(f'Wrote {update_snapshot()} bytes to {PUBLIC_SUFFIX_LIST}')
+    else:
+        with open(PUBLIC_SUFFIX_LIST) as f:
+            version = next((line.strip() for line in f if line.startswith('// VERSION:')), 'unknown version')
+        print(f'{PUBLIC_SUFFIX_LIST}: {version}')
@@ -1,17 +1,16 @@
-import pandas as pd
 import joblib
+from feature_spec import MODEL_COLUMNS
+from feature_store import build, load_frame
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
 
-# Load enhanced dataset and model
-csv_file = 'enhanced_phishing_dataset.csv'
-df = pd.read_csv(csv_file)
+# Bring the feature store up to date (only changed extractors and new rows are
+# recomputed), then load the feature matrix from it
+build()
+df = load_frame(MODEL_COLUMNS + ['label'])
 model = joblib.load('phishing_model.pkl')
 
-# Feature columns (should match those used in training)
-feature_cols = [
-    'URLLength', 'DomainLength', 'subdomain_count', 'suspicious_subdomain',
-    'punycode', 'unicode_trick', 'brand_similarity',
-]
+# Feature columns shared with serving (see feature_spec.py)
+feature_cols = MODEL_COLUMNS
 X = df[feature_cols].fillna(0)
 y_true = df['label']
 
@@ -1,22 +1,30 @@
+import argparse
+import json
+import os
+import shutil
+import numpy as np
 import pandas as pd
-import tldextract
 import re
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import urlparse
-from difflib import SequenceMatcher
+from brand_index import BRAND_INDEX
+from domain_parser import EXTRACTOR, extract_domain
+from pattern_matcher import PHISHING_PATTERNS
 
-# Load the original dataset
-input_csv = 'PhiUSIIL_Phishing_URL_Dataset.csv'
-df = pd.read_csv(input_csv, low_memory=False)
+SUSPICIOUS_SUBDOMAINS = PHISHING_PATTERNS['suspicious_subdomains']
+NEW_FEATURE_COLUMNS = ['subdomain_count', 'suspicious_subdomain', 'punycode', 'unicode_trick', 'brand_similarity']
+
+def brand_similarity(domain):
+    return BRAND_INDEX.best_match(domain)[1]
 
 def extract_new_features(url):
     features = {}
-    ext = tldextract.extract(url)
+    ext = extract_domain(url)
     parsed_url = urlparse(url)
     # Subdomain analysis
     subdomains = ext.subdomain.split('.') if ext.subdomain else []
     features['subdomain_count'] = len(subdomains)
-    suspicious_subdomains = ['localhost', 'admin', 'secure', 'login', 'paypal', 'bank', 'update', 'signin', 'account']
-    features['suspicious_subdomain'] = int(any(s in subdomains for s in suspicious_subdomains))
+    features['suspicious_subdomain'] = int(any(s in subdomains for s in SUSPICIOUS_SUBDOMAINS))
     # Punycode/unicode tricks
     features['punycode'] = int(url.startswith('xn--') or 'xn--' in url)
     try:
@@ -24,19 +32,160 @@ def extract_new_features(url):
         features['unicode_trick'] = 0
     except UnicodeEncodeError:
         features['unicode_trick'] = 1
-    # Brand similarity (max similarity to known brands)
-    known_brands = ['paypal', 'google', 'apple', 'amazon', 'bank', 'microsoft']
-    features['brand_similarity'] = max([SequenceMatcher(None, ext.domain, brand).ratio() for brand in known_brands])
+    # Brand similarity (best match in the brand index)
+    features['brand_similarity'] = brand_similarity(ext.domain)
+    return features
+
+def extract_new_features_columnar(urls):
+    # Same output as applying extract_new_features row by row, computed per column
+    urls = pd.Series(urls, dtype=object).reset_index(drop=True)
+    if urls.empty:
+        return pd.DataFrame({col: pd.Series(dtype='float64' if col == 'brand_similarity' else 'int64') for col in NEW_FEATURE_COLUMNS})
+    # tldextract only looks at the URL authority (what follows an optional scheme and
+    # '//' up to the first '/', '?' or '#'), so each distinct authority is parsed once
+    # (with the shared extractor directly; the per-request memo would only churn)
+    authority = urls.str.replace(r'^(?:[A-Za-z0-9+\-.]+:)?//', '', n=1, regex=True)
+    authority = authority.str.extract(r'^([^/?#]*)', expand=False)
+    parsed = {value: EXTRACTOR(value) for value in pd.unique(authority)}
+    subdomain = authority.map({value: ext.subdomain for value, ext in parsed.items()})
+    domain = authority.map({value: ext.domain for value, ext in parsed.items()})
+    features = pd.DataFrame(index=urls.index)
+    features['subdomain_count'] = np.where(subdomain == '', 0, subdomain.str.count(r'\.') + 1).astype('int64')
+    labels = subdomain.str.split('.').explode()
+    features['suspicious_subdomain'] = labels.isin(SUSPICIOUS_SUBDOMAINS).groupby(level=0).any().astype('int64')
+    features['punycode'] = urls.str.contains('xn--', regex=False).astype('int64')
+    features['unicode_trick'] = urls.str.contains(r'[^\x00-\x7f]', regex=True).astype('int64')
+    unique_domains, inverse = np.unique(domain.to_numpy(dtype=str), return_inverse=True)
+    similarity = np.array([brand_similarity(value) for value in unique_domains], dtype='float64')
+    features['brand_similarity'] = similarity[inverse.reshape(-1)]
     return features
 
-# Extract new features for each row
-new_features = df['URL'].apply(extract_new_features)
-new_features_df = pd.DataFrame(list(new_features))
+def extract_new_features_parallel(urls, workers=None, chunk_size=50000):
+    urls = pd.Series(urls, dtype=object).reset_index(drop=True)
+    chunks = [urls.iloc[start:start + chunk_size] for start in range(0, len(urls), chunk_size)]
+    if len(chunks) <= 1 or workers == 1:
+        return extract_new_features_columnar(urls)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(extract_new_features_columnar, chunks))
+    return pd.concat(parts, ignore_index=True)
+
+def verify_columnar(urls):
+    expected = pd.DataFrame(list(pd.Series(urls, dtype=object).apply(extract_new_features)))
+    actual = extract_new_features_columnar(urls)
+    pd.testing.assert_frame_equal(actual, expected[NEW_FEATURE_COLUMNS])
+
+def shard_path(shard_dir, chunk_id):
+    return os.path.join(shard_dir, f'part-{chunk_id:05d}.csv')
+
+def input_stamp(input_csv):
+    # Size and mtime of the input: shards from an earlier version of the file must
+    # not be merged with rows from the current one
+    stat = os.stat(input_csv)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def load_checkpoint(shard_dir, input_csv, chunk_size):
+    path = os.path.join(shard_dir, 'checkpoint.json')
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint['input'] != os.path.abspath(input_csv) or checkpoint['chunk_size'] != chunk_size:
+        raise Exception(f'{path} belongs to a different run; use a new --shard-dir or the same --chunk-size')
+    if checkpoint.get('input_stamp') != input_stamp(input_csv):
+        raise Exception(f'{input_csv} changed since {path} was written; use a new --shard-dir')
+    return set(checkpoint['completed'])
+
+def save_checkpoint(shard_dir, input_csv, chunk_size, completed, total_chunks=None):
+    path = os.path.join(shard_dir, 'checkpoint.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump({
+            'input': os.path.abspath(input_csv),
+            'input_stamp': input_stamp(input_csv),
+            'chunk_size': chunk_size,
+            'completed': sorted(completed),
+            'total_chunks': total_chunks
+        }, f)
+    os.replace(path + '.tmp', path)
+
+def process_chunk(chunk_id, chunk, shard_dir):
+    chunk = chunk.reset_index(drop=True)
+    enhanced = pd.concat([chunk, extract_new_features_columnar(chunk['URL'])], axis=1)
+    # Write to a temp file first so a crash never leaves a half-written shard behind
+    path = shard_path(shard_dir, chunk_id)
+    enhanced.to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    return chunk_id
+
+def merge_shards(shard_dir, total_chunks, output_csv):
+    # Checked before the output is truncated, so a failed merge keeps the old one
+    missing = [chunk_id for chunk_id in range(total_chunks) if not os.path.exists(shard_path(shard_dir, chunk_id))]
+    if missing:
+        raise Exception(f'{len(missing)} shards missing from {shard_dir} (first: {shard_path(shard_dir, missing[0])})')
+    with open(output_csv, 'w', newline='', encoding='utf-8') as out:
+        for chunk_id in range(total_chunks):
+            with open(shard_path(shard_dir, chunk_id), newline='', encoding='utf-8') as shard:
+                header = shard.readline()
+                if chunk_id == 0:
+                    out.write(header)
+                shutil.copyfileobj(shard, out)
+
+def extract_streaming(input_csv, output_csv, shard_dir, chunk_size=100000, workers=None):
+    # Reads the input in fixed-size chunks, extracts each chunk in a worker process
+    # and writes one shard per chunk. At most two chunks per worker are in memory at
+    # a time, and checkpoint.json lets an interrupted run pick up where it stopped.
+    os.makedirs(shard_dir, exist_ok=True)
+    completed = load_checkpoint(shard_dir, input_csv, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    total_chunks = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk_id, chunk in enumerate(pd.read_csv(input_csv, chunksize=chunk_size, low_memory=False)):
+            total_chunks = chunk_id + 1
+            if chunk_id in completed:
+                continue
+            pending.add(pool.submit(process_chunk, chunk_id, chunk, shard_dir))
+            del chunk
+            while len(pending) >= 2 * workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                completed.update(future.result() for future in finished)
+                save_checkpoint(shard_dir, input_csv, chunk_size, completed)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            completed.update(future.result() for future in finished)
+            save_checkpoint(shard_dir, input_csv, chunk_size, completed)
+    save_checkpoint(shard_dir, input_csv, chunk_size, completed, total_chunks)
+    merge_shards(shard_dir, total_chunks, output_csv)
+    return total_chunks
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add subdomain, punycode, unicode and brand features to the PhiUSIIL dataset')
+    parser.add_argument('--input', default='PhiUSIIL_Phishing_URL_Dataset.csv')
+    parser.add_argument('--output', default='enhanced_phishing_dataset.csv')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--verify-sample', type=int, default=0, help='Check this many rows against the per-row extractor first')
+    parser.add_argument('--stream', action='store_true', help='Process the input in chunks with resumable checkpoints')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--shard-dir', default='enhanced_phishing_shards')
+    args = parser.parse_args()
+
+    if args.stream:
+        total_chunks = extract_streaming(args.input, args.output, args.shard_dir, args.chunk_size, args.workers)
+        print(f'Enhanced dataset with new features saved as {args.output} ({total_chunks} chunks)')
+    else:
+        # Load the original dataset
+        df = pd.read_csv(args.input, low_memory=False)
+
+        if args.verify_sample:
+            verify_columnar(df['URL'].sample(min(args.verify_sample, len(df)), random_state=0))
+            print(f'Columnar extractor matches the per-row extractor on {min(args.verify_sample, len(df))} rows')
+
+        # Extract new features for every row
+        new_features_df = extract_new_features_parallel(df['URL'], workers=args.workers)
 
-# Concatenate new features to original DataFrame
-enhanced_df = pd.concat([df, new_features_df], axis=1)
+        # Concatenate new features to original DataFrame
+        enhanced_df = pd.concat([df, new_features_df], axis=1)
 
-# Save to new CSV
-enhanced_df.to_csv('enhanced_phishing_dataset.csv', index=False)
+        # Save to new CSV
+        enhanced_df.to_csv(args.output, index=False)
 
-print('Enhanced dataset with new features saved as enhanced_phishing_dataset.csv') 
\ No newline at end of file
+        print(f'Enhanced dataset with new features saved as {args.output}')
@@ -0,0 +1,61 @@
+# feature_spec.py
+import numpy as np
+
+# Feature store columns (see feature_store.FEATURE_EXTRACTORS) that phishing_model.pkl
+# is trained on. They come first in every feature vector so predict_proba can take a
+# view of them.
+MODEL_COLUMNS = [
+    'URLLength', 'DomainLength', 'subdomain_count', 'suspicious_subdomain',
+    'punycode', 'unicode_trick', 'brand_similarity',
+    'special_characters', 'suspicious_keywords_found', 'shortener_score'
+]
+
+# Rule-engine scores (0 = benign, higher = more suspicious)
+SCORE_COLUMNS = [
+    'url_length_score', 'special_chars_score', 'suspicious_words_score', 'ssl_valid_score',
+    'domain_age_score', 'suspicious_tld_score', 'ip_in_domain_score', 'subdomain_count_score',
+    'suspicious_subdomain_score', 'punycode_score', 'unicode_trick_score'
+]
+
+# Raw values that are only reported back to the caller
+REPORT_COLUMNS = ['ssl_valid', 'domain_age_days', 'contains_ip', 'suspicious_tld', 'is_localhost']
+
+FEATURE_COLUMNS = MODEL_COLUMNS + SCORE_COLUMNS + REPORT_COLUMNS
+COLUMN_INDEX = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+NUM_FEATURES = len(FEATURE_COLUMNS)
+NUM_MODEL_COLUMNS = len(MODEL_COLUMNS)
+
+def weight_vector(weights):
+    # Spread a {column: weight} dict over the full feature layout
+    vector = np.zeros(NUM_FEATURES, dtype=np.float32)
+    for name, weight in weights.items():
+        vector[COLUMN_INDEX[name]] = weight
+    return vector
+
+class FeatureRecord:
+    # One URL's features in the fixed FEATURE_COLUMNS layout; unknown values are NaN
+    __slots__ = ('values', 'matched_brand', 'timed_out_probes')
+
+    def __init__(self, values=None):
+        self.values = np.zeros(NUM_FEATURES, dtype=np.float32) if values is None else values
+        self.matched_brand = ''
+        self.timed_out_probes = []
+
+    def __getitem__(self, name):
+        return float(self.values[COLUMN_INDEX[name]])
+
+    def __setitem__(self, name, value):
+        self.values[COLUMN_INDEX[name]] = value
+
+    def is_known(self, name):
+        return not np.isnan(self.values[COLUMN_INDEX[name]])
+
+    def copy(self):
+        record = FeatureRecord(self.values.copy())
+        record.matched_brand = self.matched_brand
+        record.timed_out_probes = list(self.timed_out_probes)
+        return record
+
+    def model_input(self):
+        # A (1, NUM_MODEL_COLUMNS) view of the vector, no copy
+        return self.values[np.newaxis, :NUM_MODEL_COLUMNS]
@@ -0,0 +1,245 @@
+# feature_store.py
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import numpy as np
+import pandas as pd
+from brand_index import BRANDS_FILE, MAX_CANDIDATES, BrandIndex, bigrams
+from domain_parser import PUBLIC_SUFFIX_LIST, load_extractor, normalize_url, url_lengths
+from pattern_matcher import PATTERNS_FILE, PHISHING_MATCHER, PatternMatcher
+from extract_phishing_features import NEW_FEATURE_COLUMNS, brand_similarity, extract_new_features, extract_new_features_columnar, extract_new_features_parallel
+
+# Every column of the training matrix is kept as one .npy file (memory-mappable).
+# A column is tagged with a hash of its extractor's code and parameters, so a build
+# recomputes only columns whose extractor changed, and only rows appended to the
+# dataset since the last build for everything else.
+DATASET_CSV = 'PhiUSIIL_Phishing_URL_Dataset.csv'
+STORE_DIR = 'phishing_feature_store'
+URL_COLUMN = 'URL'
+# Copied straight from the dataset. URLLength and DomainLength are not: PhiUSIIL
+# computes its own, and the model must see the values serving computes.
+PASSTHROUGH_COLUMNS = ['label']
+
+SPECIAL_CHARACTERS = r'[!@#$%^&*(),.?":{}|<>]'
+
+# Serving extracts features from normalize_url(url) (scheme added when missing),
+# so the columns below are computed from the same string
+
+def length_features(urls):
+    unique, inverse = np.unique(urls.map(normalize_url).to_numpy(dtype=object), return_inverse=True)
+    lengths = np.array([url_lengths(url) for url in unique], dtype=np.int64).reshape(-1, 2)[inverse.reshape(-1)]
+    return pd.DataFrame({'URLLength': lengths[:, 0], 'DomainLength': lengths[:, 1]})
+
+def special_characters(urls):
+    return urls.map(normalize_url).str.count(SPECIAL_CHARACTERS).to_numpy(dtype=np.int64)
+
+def scan_urls(urls):
+    # Keywords and shorteners are found with the same matcher serving uses: one
+    # Aho-Corasick pass per distinct lowercased URL; inverse maps rows to them
+    unique, inverse = np.unique(urls.map(normalize_url).str.lower().to_numpy(dtype=object), return_inverse=True)
+    return [PHISHING_MATCHER.scan(url) for url in unique], inverse.reshape(-1)
+
+def suspicious_keywords_found(urls):
+    hits, inverse = scan_urls(urls)
+    return np.array([len(found['suspicious_keywords']) for found in hits], dtype=np.int64)[inverse]
+
+def shortener_score(urls):
+    hits, inverse = scan_urls(urls)
+    return np.array([0.8 if found['shorteners'] else 0.0 for found in hits], dtype=np.float64)[inverse]
+
+def file_digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+FEATURE_EXTRACTORS = [
+    {
+        'name': 'lengths',
+        'columns': ['URLLength', 'DomainLength'],
+        'function': length_features,
+        'code': [normalize_url, url_lengths, load_extractor],
+        'params': {'suffix_list': file_digest(PUBLIC_SUFFIX_LIST)}
+    },
+    {
+        'name': 'lexical',
+        'columns': NEW_FEATURE_COLUMNS,
+        'function': extract_new_features_parallel,
+        'code': [extract_new_features_columnar, extract_new_features, brand_similarity, BrandIndex, bigrams, load_extractor],
+        'params': {'brands': file_digest(BRANDS_FILE), 'patterns': file_digest(PATTERNS_FILE),
+                   'suffix_list': file_digest(PUBLIC_SUFFIX_LIST), 'max_brand_candidates': MAX_CANDIDATES}
+    },
+    {
+        'name': 'special_characters',
+        'columns': ['special_characters'],
+        'function': special_characters,
+        'code': [normalize_url],
+        'params': {'pattern': SPECIAL_CHARACTERS}
+    },
+    {
+        'name': 'suspicious_keywords_found',
+        'columns': ['suspicious_keywords_found'],
+        'function': suspicious_keywords_found,
+        'code': [scan_urls, normalize_url, PatternMatcher],
+        'params': {'patterns': file_digest(PATTERNS_FILE)}
+    },
+    {
+        'name': 'shortener_score',
+        'columns': ['shortener_score'],
+        'function': shortener_score,
+        'code': [scan_urls, normalize_url, PatternMatcher],
+        'params': {'patterns': file_digest(PATTERNS_FILE)}
+    }
+]
+
+def extractor_version(extractor):
+    digest = hashlib.sha256()
+    for code in [extractor['function']] + extractor['code']:
+        digest.update(inspect.getsource(code).encode('utf-8'))
+    digest.update(json.dumps(extractor['params'], sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def column_path(store_dir, name):
+    return os.path.join(store_dir, f'{name}.npy')
+
+def load_manifest(store_dir=STORE_DIR):
+    path = os.path.join(store_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {'rows': 0, 'bytes': 0, 'sha256': None, 'columns': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(store_dir, manifest):
+    path = os.path.join(store_dir, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def write_column(store_dir, name, values, keep_rows=0):
+    # Keeps the first keep_rows rows already on disk and appends values after them
+    values = np.asarray(values)
+    path = column_path(store_dir, name)
+    if keep_rows and not len(values) and os.path.exists(path):
+        # Nothing to append; load_frame already ignores rows past the manifest count
+        return
+    if keep_rows and os.path.exists(path):
+        old = np.load(path, mmap_mode='r')
+        out = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=np.result_type(old.dtype, values.dtype), shape=(keep_rows + len(values),))
+        out[:keep_rows] = old[:keep_rows]
+        out[keep_rows:] = values
+        out.flush()
+        del out, old
+    else:
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, values)
+    os.replace(path + '.tmp', path)
+
+def scan_dataset(dataset_csv, prefix_bytes):
+    # One pass over the file: hash of the first prefix_bytes bytes (to check the
+    # previous build's rows are untouched) and of the whole file
+    digest = hashlib.sha256()
+    prefix_digest = None
+    position = 0
+    last_byte = b''
+    with open(dataset_csv, 'rb') as f:
+        while True:
+            if position == prefix_bytes:
+                prefix_digest = digest.hexdigest()
+            block = f.read(min(1 << 20, prefix_bytes - position) if position < prefix_bytes else 1 << 20)
+            if not block:
+                break
+            if position < prefix_bytes <= position + len(block):
+                last_byte = block[prefix_bytes - position - 1:prefix_bytes - position]
+            digest.update(block)
+            position += len(block)
+    return prefix_digest, last_byte, digest.hexdigest(), position
+
+def read_rows(dataset_csv, start_byte, columns):
+    if start_byte == 0:
+        return pd.read_csv(dataset_csv, usecols=columns, low_memory=False)
+    header = pd.read_csv(dataset_csv, nrows=0).columns.tolist()
+    with open(dataset_csv, 'rb') as f:
+        f.seek(start_byte)
+        return pd.read_csv(f, header=None, names=header, usecols=columns, low_memory=False)
+
+def extract(extractor, urls):
+    result = extractor['function'](urls)
+    if isinstance(result, pd.DataFrame):
+        return {name: result[name].to_numpy() for name in extractor['columns']}
+    return {extractor['columns'][0]: np.asarray(result)}
+
+def build(dataset_csv=DATASET_CSV, store_dir=STORE_DIR, extractors=FEATURE_EXTRACTORS):
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = load_manifest(store_dir)
+    prefix_digest, last_byte, full_digest, size = scan_dataset(dataset_csv, manifest['bytes'])
+    # Rows from the last build are reused only if the dataset was appended to
+    append_only = (
+        manifest['bytes'] > 0 and manifest['bytes'] <= size
+        and prefix_digest == manifest['sha256'] and last_byte == b'\n'
+    )
+    old_rows = manifest['rows'] if append_only else 0
+    start_byte = manifest['bytes'] if append_only else 0
+    if not append_only:
+        manifest['columns'] = {}
+    if start_byte < size:
+        new_rows = read_rows(dataset_csv, start_byte, [URL_COLUMN] + PASSTHROUGH_COLUMNS)
+    else:
+        new_rows = pd.DataFrame(columns=[URL_COLUMN] + PASSTHROUGH_COLUMNS)
+    new_urls = new_rows[URL_COLUMN].astype(str).reset_index(drop=True)
+    report = {'rows': old_rows + len(new_rows), 'new_rows': len(new_rows), 'recomputed': [], 'appended': []}
+
+    for name in PASSTHROUGH_COLUMNS:
+        write_column(store_dir, name, new_rows[name].to_numpy(), keep_rows=old_rows)
+        manifest['columns'][name] = {'version': 'dataset'}
+
+    all_urls = None
+    for extractor in extractors:
+        version = extractor_version(extractor)
+        current = all(
+            manifest['columns'].get(name, {}).get('version') == version and os.path.exists(column_path(store_dir, name))
+            for name in extractor['columns']
+        )
+        if current:
+            if len(new_urls):
+                for name, values in extract(extractor, new_urls).items():
+                    write_column(store_dir, name, values, keep_rows=old_rows)
+                report['appended'].append(extractor['name'])
+            continue
+        # Extractor changed (or never ran): recompute its columns for every row
+        if all_urls is None:
+            all_urls = new_urls if old_rows == 0 else read_rows(dataset_csv, 0, [URL_COLUMN])[URL_COLUMN].astype(str)
+        for name, values in extract(extractor, all_urls).items():
+            write_column(store_dir, name, values)
+            manifest['columns'][name] = {'version': version}
+        report['recomputed'].append(extractor['name'])
+
+    manifest.update({
+        'dataset': os.path.abspath(dataset_csv),
+        'rows': report['rows'],
+        'bytes': size,
+        'sha256': full_digest
+    })
+    save_manifest(store_dir, manifest)
+    return report
+
+def load_frame(columns=None, store_dir=STORE_DIR, mmap=True):
+    manifest = load_manifest(store_dir)
+    columns = columns if columns is not None else list(manifest['columns'])
+    return pd.DataFrame({
+        name: np.load(column_path(store_dir, name), mmap_mode='r' if mmap else None)[:manifest['rows']]
+        for name in columns
+    })
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or update the phishing feature store')
+    parser.add_argument('--dataset', default=DATASET_CSV)
+    parser.add_argument('--store', default=STORE_DIR)
+    args = parser.parse_args()
+
+    report = build(args.dataset, args.store)
+    print(f"Rows: {report['rows']} ({report['new_rows']} new)")
+    print(f"Recomputed: {', '.join(report['recomputed']) or 'none'}")
+    print(f"Appended:   {', '.join(report['appended']) or 'none'}")
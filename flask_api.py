@@ -1,12 +1,12 @@
 from flask import Flask, request, jsonify
-import joblib
+from forest_engine import load_model
 from flask_cors import CORS
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Load the trained model
-model = joblib.load("savings_recommendation_model.pkl")
+# Load the trained model (arrays memory-mapped, shared between workers)
+model = load_model("savings_recommendation_model.pkl")
 
 @app.route('/predict', methods=['POST'])
 def predict_savings():
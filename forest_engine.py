@@ -0,0 +1,283 @@
+# forest_engine.py
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import numpy as np
+import joblib
+
+# A fitted RandomForest flattened into a handful of NumPy arrays: the nodes of all
+# trees are concatenated, each tree starting at roots[t]. Leaves point to themselves,
+# so walking every tree for max_depth steps always ends on a leaf without branching.
+ARRAY_NAMES = ['roots', 'feature', 'threshold', 'left', 'right', 'missing_left', 'value']
+# Rows per step of the batch path; bounds the (rows, trees) node-index matrix
+BATCH_ROWS = int(os.getenv('FOREST_BATCH_ROWS', 8192))
+# From this many rows on, batches are walked by sklearn's compiled tree code
+# (trees rebuilt from the flat arrays on first use: a private copy per process,
+# so the small batches we serve stay on the shared arrays)
+SKLEARN_ROWS = int(os.getenv('FOREST_SKLEARN_ROWS', 256))
+# Map model arrays read-only instead of copying them into each process
+MODEL_MMAP = os.getenv('MODEL_MMAP', '1') == '1'
+
+def flatten_forest(model):
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    is_classifier = hasattr(model, 'classes_')
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    feature, threshold, left, right, missing_left, value = [], [], [], [], [], []
+    for offset, tree in zip(offsets, trees):
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left < 0
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, 0.0, tree.threshold))
+        left.append(np.where(leaf, nodes, tree.children_left) + offset)
+        right.append(np.where(leaf, nodes, tree.children_right) + offset)
+        go_left = getattr(tree, 'missing_go_to_left', None)
+        missing_left.append(np.zeros(tree.node_count, dtype=bool) if go_left is None else go_left.astype(bool))
+        if is_classifier:
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :model.n_classes_].copy()
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(proba / normalizer)
+        else:
+            value.append(tree.value[:, 0, :1])
+    return FlatForest(
+        {
+            'roots': offsets[:-1].astype(np.int32),
+            'feature': np.concatenate(feature).astype(np.int32),
+            'threshold': np.concatenate(threshold).astype(np.float64),
+            'left': np.concatenate(left).astype(np.int32),
+            'right': np.concatenate(right).astype(np.int32),
+            'missing_left': np.concatenate(missing_left),
+            'value': np.concatenate(value).astype(np.float64)
+        },
+        {
+            'kind': 'classifier' if is_classifier else 'regressor',
+            'classes': model.classes_.tolist() if is_classifier else None,
+            'n_features': int(model.n_features_in_),
+            'max_depth': int(max(tree.max_depth for tree in trees))
+        }
+    )
+
+class FlatForest:
+    # Drop-in for the predict/predict_proba calls we make on sklearn forests
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        self.roots = arrays['roots']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.missing_left = arrays['missing_left']
+        self.value = arrays['value']
+        self.max_depth = meta['max_depth']
+        self.n_features_in_ = meta['n_features']
+        self.classes_ = np.array(meta['classes']) if meta['classes'] is not None else None
+        self._sklearn_trees = None
+
+    def apply(self, X):
+        # Leaf index reached in every tree, shape (rows, trees). Like sklearn the
+        # input is compared as float32, and NaN follows missing_left.
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        nodes = np.tile(self.roots, n_rows)
+        x_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * X.shape[1], n_trees)
+        X_flat = X.ravel()
+        # (row, tree) pairs still on an internal node; the rest have reached their leaf
+        active = np.flatnonzero(self.left[nodes] != nodes)
+        while active.size:
+            current = nodes[active]
+            x = X_flat[x_offset[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left[missing] = self.missing_left[current[missing]]
+            step = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = step
+            active = active[self.left[step] != step]
+        return nodes.reshape(n_rows, n_trees)
+
+    def apply_one(self, row):
+        # Single-row fast path: one small vector op per level across all trees
+        row = np.asarray(row, dtype=np.float32).reshape(-1)
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            x = row[self.feature[nodes]]
+            go_left = x <= self.threshold[nodes]
+            if np.isnan(x).any():
+                go_left = np.where(np.isnan(x), self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes[np.newaxis, :]
+
+    def sklearn_trees(self):
+        if self._sklearn_trees is None:
+            from sklearn.tree._tree import NODE_DTYPE, Tree
+            trees = []
+            for start, end in zip(self.roots, np.append(self.roots[1:], len(self.feature))):
+                count = int(end - start)
+                left = self.left[start:end] - start
+                leaf = left == np.arange(count)
+                nodes = np.zeros(count, dtype=NODE_DTYPE)
+                nodes['left_child'] = np.where(leaf, -1, left)
+                nodes['right_child'] = np.where(leaf, -1, self.right[start:end] - start)
+                nodes['feature'] = np.where(leaf, -2, self.feature[start:end])
+                nodes['threshold'] = np.where(leaf, -2.0, self.threshold[start:end])
+                if 'missing_go_to_left' in nodes.dtype.names:
+                    nodes['missing_go_to_left'] = self.missing_left[start:end]
+                # Only apply() is used, so the leaf values stay in self.value
+                tree = Tree(self.n_features_in_, np.array([1], dtype=np.intp), 1)
+                tree.__setstate__({'max_depth': self.max_depth, 'node_count': count, 'nodes': nodes, 'values': np.zeros((count, 1, 1))})
+                trees.append(tree)
+            self._sklearn_trees = trees
+        return self._sklearn_trees
+
+    def _average_sklearn(self, X):
+        # Same sum as _average, one tree at a time, without the (rows, trees) matrix
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        total = np.zeros((X.shape[0], self.value.shape[1]))
+        for root, tree in zip(self.roots, self.sklearn_trees()):
+            total += self.value[tree.apply(X) + root]
+        return total / len(self.roots)
+
+    def _average(self, leaves):
+        # sklearn adds the trees one at a time and then divides, so sum sequentially
+        # (cumsum) rather than with np.sum's pairwise reduction
+        return np.cumsum(self.value[leaves], axis=1)[:, -1] / len(self.roots)
+
+    def _predict_values(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1 or X.shape[0] == 1:
+            return self._average(self.apply_one(X))
+        if X.shape[0] >= SKLEARN_ROWS:
+            return np.concatenate([
+                self._average_sklearn(X[start:start + BATCH_ROWS])
+                for start in range(0, X.shape[0], BATCH_ROWS)
+            ])
+        return np.concatenate([
+            self._average(self.apply(X[start:start + BATCH_ROWS]))
+            for start in range(0, X.shape[0], BATCH_ROWS)
+        ]) if X.shape[0] else np.empty((0, self.value.shape[1]))
+
+    def predict_proba(self, X):
+        return self._predict_values(X)
+
+    def predict(self, X):
+        values = self._predict_values(X)
+        if self.classes_ is None:
+            return values[:, 0]
+        return self.classes_[np.argmax(values, axis=1)]
+
+def is_forest(model):
+    return hasattr(model, 'estimators_') and hasattr(model.estimators_[0], 'tree_')
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def forest_dir_for(model_path):
+    return os.path.splitext(model_path)[0] + '.forest'
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def remove_stale_exports(out_dir):
+    # Temp and old directories left by an export that died before cleaning up.
+    # One named after this process is from an earlier run (the pid was reused).
+    parent, base = os.path.split(os.path.abspath(out_dir))
+    for name in os.listdir(parent):
+        match = re.fullmatch(re.escape(base) + r'\.(?:tmp|old)-(\d+)', name)
+        if match and (int(match.group(1)) == os.getpid() or not process_alive(int(match.group(1)))):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+def save_forest(forest, model_path, out_dir, sha256=None):
+    # Written to a temp directory and renamed into place, so a process loading
+    # the model never sees half an export; mmaps of a replaced export stay valid
+    remove_stale_exports(out_dir)
+    tmp_dir = f'{out_dir}.tmp-{os.getpid()}'
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name in ARRAY_NAMES:
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), forest.arrays[name])
+    meta = dict(forest.meta, source=os.path.basename(model_path), source_sha256=sha256 or file_sha256(model_path))
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    if os.path.exists(out_dir):
+        old_dir = f'{out_dir}.old-{os.getpid()}'
+        os.rename(out_dir, old_dir)
+        os.rename(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        os.rename(tmp_dir, out_dir)
+    return out_dir
+
+def export_forest(model_path, out_dir=None):
+    # Writes one .npy per array plus meta.json into <model>.forest/
+    return save_forest(flatten_forest(joblib.load(model_path)), model_path, out_dir or forest_dir_for(model_path))
+
+def load_forest(forest_dir, mmap_mode=None):
+    with open(os.path.join(forest_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(forest_dir, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+    return FlatForest(arrays, meta)
+
+def export_is_current(model_path, sha256=None):
+    # The export must come from this exact pickle: mtimes aren't enough, since
+    # cp -p / rsync -t can put an older mtime on a different model
+    meta_path = os.path.join(forest_dir_for(model_path), 'meta.json')
+    if not os.path.exists(meta_path):
+        return False
+    if not os.path.exists(model_path):
+        return True
+    with open(meta_path) as f:
+        source_sha256 = json.load(f).get('source_sha256')
+    return source_sha256 == (sha256 or file_sha256(model_path))
+
+def load_model(model_path, mmap=MODEL_MMAP, sha256=None):
+    # Forests are served from the exported arrays (re-exported on first use when
+    # they weren't made from this pickle; pass sha256 if it is already known). With
+    # mmap the arrays are mapped read-only, so every worker on the host shares one
+    # copy through the page cache. Anything that isn't a forest is loaded with
+    # joblib, which can map the arrays inside the pickle too.
+    mmap_mode = 'r' if mmap else None
+    if os.path.exists(model_path):
+        sha256 = sha256 or file_sha256(model_path)
+    if export_is_current(model_path, sha256):
+        return load_forest(forest_dir_for(model_path), mmap_mode)
+    model = joblib.load(model_path, mmap_mode=mmap_mode)
+    if not is_forest(model):
+        return model
+    if mmap:
+        try:
+            # Workers starting together export once; the rest wait and map it
+            with open(forest_dir_for(model_path) + '.lock', 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if not export_is_current(model_path, sha256):
+                    save_forest(flatten_forest(model), model_path, forest_dir_for(model_path), sha256)
+            return load_forest(forest_dir_for(model_path), mmap_mode)
+        except OSError:
+            # Read-only checkout: fall back to a private in-memory copy
+            pass
+    return flatten_forest(model)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export RandomForest pickles to flat NumPy arrays')
+    parser.add_argument('models', nargs='*', default=['phishing_model.pkl', 'goal_feasibility_model.pkl'])
+    args = parser.parse_args()
+
+    for model_path in args.models:
+        if not os.path.exists(model_path):
+            print(f'Skipping {model_path}: not found')
+            continue
+        print(f'Exported {model_path} to {export_forest(model_path)}')
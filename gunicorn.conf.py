@@ -0,0 +1,9 @@
+# gunicorn.conf.py
+import os
+
+wsgi_app = 'app:create_app()'
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Import app.py (and load its models) once in the master before forking workers
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
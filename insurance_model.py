@@ -1,6 +1,8 @@
 # insurance_model.py
+from rule_messages import messages_for
 
-def recommend_insurance_logic(data):
+def recommend_insurance_logic(data, lang='en'):
+    t = messages_for(lang)
     # Extract user inputs
     age = int(data.get('age', 30))
     income = float(data.get('income', 50000))
@@ -31,20 +33,20 @@ def recommend_insurance_logic(data):
     # Adjust for health condition
     if health_condition == 'Excellent':
         health_premium = base_health_premium * 0.7
-        tips.append('Excellent health condition helps reduce premium costs.')
+        tips.append(t('insuranceTipExcellentHealth'))
     elif health_condition == 'Good':
         health_premium = base_health_premium * 0.9
     elif health_condition == 'Fair':
         health_premium = base_health_premium * 1.2
-        warnings.append('Consider improving health habits to reduce premiums.')
+        warnings.append(t('insuranceWarningFairHealth'))
     else:  # Poor
         health_premium = base_health_premium * 1.8
-        warnings.append('Poor health condition significantly increases premiums.')
+        warnings.append(t('insuranceWarningPoorHealth'))
     
     # Adjust for family size
     if family_size > 4:
         health_premium *= 1.3
-        tips.append('Consider family floater plans for better value.')
+        tips.append(t('insuranceTipFamilyFloater'))
     
     # Life Insurance Analysis
     life_coverage = income * 10  # 10x annual income
@@ -52,7 +54,7 @@ def recommend_insurance_logic(data):
     
     if age > 50:
         life_premium *= 1.5
-        warnings.append('Life insurance premiums increase with age.')
+        warnings.append(t('insuranceWarningLifeAge'))
     
     # Vehicle Insurance Analysis
     vehicle_premium = 0
@@ -66,7 +68,7 @@ def recommend_insurance_logic(data):
     # Adjust for vehicle age
     if vehicle_age > 10:
         vehicle_premium = base_vehicle_premium * 1.5
-        warnings.append('Older vehicles may have higher insurance costs.')
+        warnings.append(t('insuranceWarningOldVehicle'))
     elif vehicle_age > 5:
         vehicle_premium = base_vehicle_premium * 1.2
     else:
@@ -75,54 +77,54 @@ def recommend_insurance_logic(data):
     # Adjust for driving history
     if driving_history == 'Excellent':
         vehicle_premium *= 0.7
-        tips.append('Excellent driving record helps reduce vehicle insurance costs.')
+        tips.append(t('insuranceTipExcellentDriving'))
     elif driving_history == 'Good':
         vehicle_premium *= 0.9
     elif driving_history == 'Fair':
         vehicle_premium *= 1.3
-        warnings.append('Improve driving record to reduce vehicle insurance costs.')
+        warnings.append(t('insuranceWarningFairDriving'))
     else:  # Poor
         vehicle_premium *= 2.0
-        warnings.append('Poor driving record significantly increases vehicle insurance costs.')
+        warnings.append(t('insuranceWarningPoorDriving'))
     
     # Occupation-based adjustments
     if occupation == 'High Risk':
         health_premium *= 1.5
         life_premium *= 1.3
-        warnings.append('High-risk occupation increases insurance premiums.')
+        warnings.append(t('insuranceWarningHighRiskJob'))
     elif occupation == 'Professional':
         health_premium *= 0.9
         life_premium *= 0.9
-        tips.append('Professional occupation may qualify for better rates.')
+        tips.append(t('insuranceTipProfessional'))
     
     # Income-based recommendations
     if income < 30000:
-        recommendations.append('Consider basic health insurance plans within your budget.')
-        recommendations.append('Term life insurance may be more affordable than whole life.')
+        recommendations.append(t('insuranceRecBasicHealth'))
+        recommendations.append(t('insuranceRecTermLife'))
     elif income > 100000:
-        recommendations.append('Consider comprehensive health insurance with higher coverage.')
-        recommendations.append('Whole life insurance provides additional investment benefits.')
+        recommendations.append(t('insuranceRecComprehensiveHealth'))
+        recommendations.append(t('insuranceRecWholeLife'))
     
     # Existing insurance analysis
     if existing_insurance == 'None':
-        warnings.append('No existing insurance coverage. Consider basic health and life insurance.')
-        recommendations.append('Start with basic health insurance and term life insurance.')
+        warnings.append(t('insuranceWarningNoCoverage'))
+        recommendations.append(t('insuranceRecStartBasic'))
     elif existing_insurance == 'Basic':
-        recommendations.append('Consider upgrading to comprehensive coverage for better protection.')
+        recommendations.append(t('insuranceRecUpgrade'))
     elif existing_insurance == 'Comprehensive':
-        tips.append('Good existing coverage. Review annually for optimal rates.')
+        tips.append(t('insuranceTipReviewAnnually'))
     
     # Calculate total annual premium
     total_annual_premium = health_premium + (life_premium * 12) + vehicle_premium
     
     # Determine coverage adequacy
-    coverage_adequacy = 'Good'
+    coverage_adequacy = t('levelGood')
     if total_annual_premium < income * 0.05:
-        coverage_adequacy = 'Excellent'
-        tips.append('Insurance costs are well within your budget.')
+        coverage_adequacy = t('levelExcellent')
+        tips.append(t('insuranceTipWithinBudget'))
     elif total_annual_premium > income * 0.15:
-        coverage_adequacy = 'Poor'
-        warnings.append('Insurance costs are high relative to income. Consider basic plans.')
+        coverage_adequacy = t('levelPoor')
+        warnings.append(t('insuranceWarningHighCost'))
     
     return {
         'premiums': {
@@ -134,22 +136,22 @@ def recommend_insurance_logic(data):
         },
         'coverage': {
             'life_coverage': round(life_coverage, 2),
-            'health_coverage': 'Up to ₹5,00,000 per year',
-            'vehicle_coverage': 'Comprehensive coverage'
+            'health_coverage': t('insuranceHealthCoverage'),
+            'vehicle_coverage': t('insuranceVehicleCoverage')
         },
         'recommendations': recommendations,
         'warnings': warnings,
         'tips': tips,
         'coverage_adequacy': coverage_adequacy,
         'risk_assessment': {
-            'health_risk': 'Low' if health_condition in ['Excellent', 'Good'] else 'High',
-            'life_risk': 'Low' if age < 45 else 'Medium' if age < 60 else 'High',
-            'vehicle_risk': 'Low' if driving_history in ['Excellent', 'Good'] else 'High'
+            'health_risk': t('levelLow') if health_condition in ['Excellent', 'Good'] else t('levelHigh'),
+            'life_risk': t('levelLow') if age < 45 else t('levelMedium') if age < 60 else t('levelHigh'),
+            'vehicle_risk': t('levelLow') if driving_history in ['Excellent', 'Good'] else t('levelHigh')
         },
         'next_steps': [
-            'Compare quotes from multiple insurers',
-            'Consider bundling policies for discounts',
-            'Review coverage annually',
-            'Maintain good health and driving record'
+            t('insuranceStepCompareQuotes'),
+            t('insuranceStepBundle'),
+            t('insuranceStepReviewAnnually'),
+            t('insuranceStepMaintainRecord')
         ]
     } 
\ No newline at end of file
@@ -0,0 +1,118 @@
+# micro_batcher.py
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+import numpy as np
+
+class MicroBatcher:
+    # Collects concurrent predict calls for up to max_rows rows or max_wait_ms,
+    # runs the model once on the stacked rows and hands each caller its slice.
+    def __init__(self, predict, max_rows=64, max_wait_ms=2.0, name='micro-batcher'):
+        self.predict_batch = predict
+        self.max_rows = max_rows
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self.batches = 0
+        self.rows = 0
+        self.batch_rows = Counter()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def _ensure_worker(self):
+        # Started lazily, and again in a forked worker process (threads don't survive fork)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def predict(self, rows):
+        rows = np.asarray(rows)
+        # A caller that already holds several rows runs them at once: waiting out
+        # the window for company would only delay it
+        if self.max_rows > 1 and not self.closed and len(rows) == 1:
+            self._ensure_worker()
+            future = Future()
+            with self._lock:
+                queued = not self.closed
+                if queued:
+                    self._queue.put((rows, future))
+            if queued:
+                return future.result()
+        # Batching disabled, a multi-row call, or the batcher was closed (its model
+        # was replaced)
+        self._record(len(rows))
+        return self.predict_batch(rows)
+
+    def close(self):
+        # Requests already queued are still answered; later ones run unbatched
+        with self._lock:
+            self.closed = True
+            if self._pid == os.getpid():
+                self._queue.put(None)
+
+    def _run(self):
+        requests = self._queue
+        while True:
+            item = requests.get()
+            if item is None:
+                return
+            batch = [item]
+            count = len(item[0])
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while count < self.max_rows:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = requests.get(timeout=remaining) if remaining > 0 else requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._run_batch(batch, count)
+                    return
+                batch.append(item)
+                count += len(item[0])
+            self._run_batch(batch, count)
+
+    def _run_batch(self, batch, count):
+        self._record(count)
+        try:
+            stacked = batch[0][0] if len(batch) == 1 else np.concatenate([rows for rows, _ in batch])
+            results = self.predict_batch(stacked)
+        except Exception:
+            # One malformed request shouldn't fail everyone it was batched with
+            for rows, future in batch:
+                try:
+                    future.set_result(self.predict_batch(rows))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        start = 0
+        for rows, future in batch:
+            future.set_result(results[start:start + len(rows)])
+            start += len(rows)
+
+    def _record(self, count):
+        with self._lock:
+            self.batches += 1
+            self.rows += count
+            self.batch_rows[count] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_rows': self.max_rows,
+                'max_wait_ms': self.max_wait_ms,
+                'batches': self.batches,
+                'rows': self.rows,
+                'mean_batch_rows': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'batch_rows': {str(size): n for size, n in sorted(self.batch_rows.items())}
+            }
@@ -0,0 +1,214 @@
+# model_registry.py
+import argparse
+import datetime
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import numpy as np
+from forest_engine import file_sha256, load_model
+from micro_batcher import MicroBatcher
+
+# Versioned models live in <REGISTRY_DIR>/<name>/<version>/model.pkl next to a
+# meta.json with the pickle's sha256. <name>/CURRENT holds the active version.
+REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', 'model_registry')
+# Seconds between checks of CURRENT for a new version (0 turns the watch off)
+WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))
+
+logger = logging.getLogger(__name__)
+
+def write_atomic(path, text):
+    with open(path + '.tmp', 'w') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+def publish(name, model_path, version=None, activate=True, registry_dir=REGISTRY_DIR):
+    version = version or datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    model_dir = os.path.join(registry_dir, name, version)
+    if os.path.exists(model_dir):
+        raise Exception(f'{name} version {version} already exists')
+    tmp_dir = model_dir + '.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    shutil.copyfile(model_path, os.path.join(tmp_dir, 'model.pkl'))
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump({
+            'version': version,
+            'sha256': file_sha256(os.path.join(tmp_dir, 'model.pkl')),
+            'source': os.path.abspath(model_path),
+            'published_at': datetime.datetime.now().isoformat(timespec='seconds')
+        }, f, indent=2)
+    os.rename(tmp_dir, model_dir)
+    if activate:
+        activate_version(name, version, registry_dir)
+    return version
+
+def activate_version(name, version, registry_dir=REGISTRY_DIR):
+    if not os.path.exists(os.path.join(registry_dir, name, version, 'meta.json')):
+        raise Exception(f'{name} version {version} is not in the registry')
+    write_atomic(os.path.join(registry_dir, name, 'CURRENT'), version + '\n')
+
+def list_versions(name, registry_dir=REGISTRY_DIR):
+    base = os.path.join(registry_dir, name)
+    if not os.path.isdir(base):
+        return []
+    return sorted(v for v in os.listdir(base) if os.path.exists(os.path.join(base, v, 'meta.json')))
+
+class ModelEntry:
+    # One loaded model version; requests hold on to the entry they started with
+    def __init__(self, version, model, sha256, batcher):
+        self.version = version
+        self.model = model
+        self.sha256 = sha256
+        self.batcher = batcher
+        self.loaded_at = datetime.datetime.now().isoformat(timespec='seconds')
+
+    def predict_proba(self, rows):
+        return self.batcher.predict(rows)
+
+class ModelRegistry:
+    # Keeps the active version of one model. Loading a version verifies its
+    # checksum and runs a warm-up prediction before the reference is swapped, so
+    # a bad artifact never replaces a working model.
+    def __init__(self, name, legacy_path=None, n_features=None, batch_rows=64, batch_wait_ms=2.0,
+                 registry_dir=REGISTRY_DIR, watch_interval=WATCH_INTERVAL):
+        self.name = name
+        self.legacy_path = legacy_path
+        self.n_features = n_features
+        self.batch_rows = batch_rows
+        self.batch_wait_ms = batch_wait_ms
+        self.registry_dir = registry_dir
+        self.watch_interval = watch_interval
+        self.error = None
+        self._current = None
+        self._reload_lock = threading.Lock()
+        self._watch_pid = None
+        self.reload()
+
+    @property
+    def current(self):
+        # The watch thread is started lazily so each forked worker gets its own
+        if self.watch_interval and self._watch_pid != os.getpid():
+            self._start_watch()
+        return self._current
+
+    def version_source(self, version):
+        # (version, path, expected sha256) of a published version
+        model_dir = os.path.join(self.registry_dir, self.name, version)
+        if not os.path.exists(os.path.join(model_dir, 'meta.json')):
+            raise Exception(f'{self.name} version {version} is not in the registry')
+        with open(os.path.join(model_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        return version, os.path.join(model_dir, 'model.pkl'), meta['sha256']
+
+    def active_source(self):
+        # (version, path, expected sha256) of the version that should be serving
+        current_file = os.path.join(self.registry_dir, self.name, 'CURRENT')
+        if os.path.exists(current_file):
+            with open(current_file) as f:
+                return self.version_source(f.read().strip())
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            # Not published yet: serve the plain pickle, versioned by its checksum
+            sha256 = file_sha256(self.legacy_path)
+            return f'{os.path.basename(self.legacy_path)}@{sha256[:12]}', self.legacy_path, sha256
+        raise Exception(f'No {self.name} model: nothing in {self.registry_dir}/{self.name} and no {self.legacy_path}')
+
+    def load(self, version, path, expected_sha256):
+        sha256 = file_sha256(path)
+        if sha256 != expected_sha256:
+            raise Exception(f'checksum mismatch for {path}: expected {expected_sha256[:12]}, got {sha256[:12]}')
+        model = load_model(path, sha256=sha256)
+        n_features = self.n_features or getattr(model, 'n_features_in_', None)
+        probabilities = np.asarray(model.predict_proba(np.zeros((1, n_features), dtype=np.float32)))
+        if probabilities.shape != (1, 2) or not np.all(np.isfinite(probabilities)):
+            raise Exception(f'warm-up prediction returned {probabilities!r}')
+        batcher = MicroBatcher(model.predict_proba, self.batch_rows, self.batch_wait_ms, name=f'{self.name}-{version}-batcher')
+        return ModelEntry(version, model, sha256, batcher)
+
+    def reload(self, version=None):
+        # Swaps in the active (or the given) version if it isn't already serving.
+        # In-flight requests keep the entry they grabbed and finish on it. A given
+        # version is written to CURRENT only after it has loaded and passed its
+        # checks, so other workers never follow a broken version.
+        with self._reload_lock:
+            entry = None
+            try:
+                source = self.version_source(version) if version is not None else self.active_source()
+                entry = self._current
+                if entry is None or (entry.version, entry.sha256) != (source[0], source[2]):
+                    entry = self.load(*source)
+                if version is not None:
+                    activate_version(self.name, version, self.registry_dir)
+            except Exception as e:
+                if entry is not None and entry is not self._current:
+                    entry.batcher.close()
+                self.error = str(e)
+                logger.error('%s model not loaded: %s', self.name, e)
+                return self.status()
+            previous, self._current = self._current, entry
+            # Also cleared by a no-op reload: the serving version is healthy
+            self.error = None
+            if previous is not entry:
+                if previous is not None:
+                    previous.batcher.close()
+                logger.info('%s model version %s loaded', self.name, entry.version)
+            return self.status()
+
+    def _start_watch(self):
+        with self._reload_lock:
+            if self._watch_pid == os.getpid():
+                return
+            self._watch_pid = os.getpid()
+        threading.Thread(target=self._watch, name=f'{self.name}-model-watch', daemon=True).start()
+
+    def _watch(self):
+        last_seen = None
+        while True:
+            time.sleep(self.watch_interval)
+            stamp = []
+            for path in (os.path.join(self.registry_dir, self.name, 'CURRENT'), self.legacy_path):
+                try:
+                    stamp.append(os.stat(path).st_mtime_ns)
+                except (OSError, TypeError):
+                    stamp.append(None)
+            if stamp != last_seen:
+                last_seen = stamp
+                self.reload()
+
+    def status(self):
+        entry = self._current
+        return {
+            'name': self.name,
+            'version': entry.version if entry else None,
+            'sha256': entry.sha256 if entry else None,
+            'loaded_at': entry.loaded_at if entry else None,
+            'error': self.error,
+            'available_versions': list_versions(self.name, self.registry_dir),
+            'batcher': entry.batcher.stats() if entry else None
+        }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Publish and activate model versions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    publish_parser = subparsers.add_parser('publish', help='Copy a pickle into the registry as a new version')
+    publish_parser.add_argument('name')
+    publish_parser.add_argument('model_path')
+    publish_parser.add_argument('--version')
+    publish_parser.add_argument('--no-activate', action='store_true')
+    activate_parser = subparsers.add_parser('activate', help='Make an existing version the active one')
+    activate_parser.add_argument('name')
+    activate_parser.add_argument('version')
+    list_parser = subparsers.add_parser('list', help='List the versions of a model')
+    list_parser.add_argument('name')
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        version = publish(args.name, args.model_path, args.version, activate=not args.no_activate)
+        print(f'Published {args.name} version {version}')
+    elif args.command == 'activate':
+        activate_version(args.name, args.version)
+        print(f'Activated {args.name} version {args.version}')
+    else:
+        for version in list_versions(args.name):
+            print(version)
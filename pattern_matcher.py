@@ -0,0 +1,61 @@
+# pattern_matcher.py
+import json
+import os
+from collections import deque
+
+PATTERNS_FILE = os.environ.get('PHISHING_PATTERNS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'phishing_patterns.json'))
+
+class PatternMatcher:
+    # Aho-Corasick automaton over several named pattern lists; scan() finds every
+    # pattern of every list in a single pass over the text
+    def __init__(self, patterns):
+        self.categories = list(patterns)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for category, words in patterns.items():
+            for word in dict.fromkeys(words):
+                if not word:
+                    continue
+                state = 0
+                for ch in word:
+                    if ch not in self.goto[state]:
+                        self.goto.append({})
+                        self.fail.append(0)
+                        self.output.append(())
+                        self.goto[state][ch] = len(self.goto) - 1
+                    state = self.goto[state][ch]
+                self.output[state] += ((category, word),)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.output[child] += self.output[self.fail[child]]
+
+    def scan(self, text):
+        hits = {category: set() for category in self.categories}
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for category, word in output[state]:
+                hits[category].add(word)
+        return hits
+
+def load_patterns(path=PATTERNS_FILE):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+PHISHING_PATTERNS = load_patterns()
+PHISHING_MATCHER = PatternMatcher({
+    'suspicious_keywords': PHISHING_PATTERNS['suspicious_keywords'],
+    'shorteners': PHISHING_PATTERNS['shorteners'],
+    'suspicious_subdomains': PHISHING_PATTERNS['suspicious_subdomains']
+})
@@ -1,70 +1,213 @@
 import re
-import tldextract
+import asyncio
 import numpy as np
-import joblib
 import socket
 import ssl
 import whois
 import datetime
-from difflib import SequenceMatcher
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from brand_index import BRAND_INDEX
+from domain_parser import extract_domain, hostname_cache_stats, normalize_url, url_lengths
+from pattern_matcher import PHISHING_MATCHER
+from ttl_cache import TTLCache, MISSING
+from feature_spec import FeatureRecord, COLUMN_INDEX, NUM_MODEL_COLUMNS, weight_vector
+from model_registry import ModelRegistry
 
-# Load the machine learning model
-try:
-    ML_MODEL = joblib.load('phishing_model.pkl')
-except Exception as e:
-    ML_MODEL = None
+# The machine learning model comes from the model registry (model_registry/phishing,
+# falling back to phishing_model.pkl) and is hot-swapped when a new version is
+# activated. Concurrent requests share one predict_proba call: up to
+# PHISHING_ML_BATCH_ROWS rows or PHISHING_ML_BATCH_WAIT_MS milliseconds, whichever
+# comes first (1 row disables batching).
+ML_REGISTRY = ModelRegistry(
+    'phishing',
+    legacy_path='phishing_model.pkl',
+    n_features=NUM_MODEL_COLUMNS,
+    batch_rows=int(os.environ.get('PHISHING_ML_BATCH_ROWS', 64)),
+    batch_wait_ms=float(os.environ.get('PHISHING_ML_BATCH_WAIT_MS', 2.0))
+)
 
 def create_model():
     weights = {
-        'url_length': 0.05,
-        'special_chars': 0.1,
-        'suspicious_words': 0.25,
-        'ssl_valid': 0.2,
-        'domain_age': 0.2,
-        'suspicious_tld': 0.15,
-        'ip_in_domain': 0.05
+        'url_length_score': 0.05,
+        'special_chars_score': 0.1,
+        'suspicious_words_score': 0.25,
+        'ssl_valid_score': 0.2,
+        'domain_age_score': 0.2,
+        'suspicious_tld_score': 0.15,
+        'ip_in_domain_score': 0.05,
+        'subdomain_count_score': 0.1,
+        'suspicious_subdomain_score': 0.2,
+        'punycode_score': 0.2,
+        'unicode_trick_score': 0.2,
+        'shortener_score': 0.3
     }
     return weights
 
 PHISHING_WEIGHTS = create_model()
+RULE_WEIGHT_VECTOR = weight_vector(PHISHING_WEIGHTS)
+PHISHING_THRESHOLD = 30
+PHISHING_STAGED = os.environ.get('PHISHING_STAGED', '0') == '1'
 
-def extract_features(url):
-    features = {}
-    parsed_url = tldextract.extract(url)
-    ext = parsed_url
-    url_length = len(url)
-    features['URL Length'] = url_length
+# Every (ssl_valid_score, domain_age_score) pair the probes can produce, used by staged checks
+NETWORK_OUTCOME_SCORES = np.array([[0.0, 0.9], [0.0, 0.6], [0.0, 0.3], [0.0, 0.0],
+                                   [0.8, 0.9], [0.8, 0.6], [0.8, 0.3], [0.8, 0.0]], dtype=np.float32)
+NETWORK_SKIPPED = {'ssl_valid': None, 'domain_age': None, 'skipped': ['ssl', 'whois']}
+
+# Limits for /api/check/batch
+BATCH_MAX_URLS = int(os.environ.get('PHISHING_BATCH_MAX_URLS', 100))
+BATCH_MAX_WORKERS = int(os.environ.get('PHISHING_BATCH_MAX_WORKERS', 16))
+
+# Overall deadline for the SSL and WHOIS probes in the async path
+PROBE_BUDGET = float(os.environ.get('PHISHING_PROBE_BUDGET', 5.0))
+PROBE_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get('PHISHING_PROBE_WORKERS', 32)))
+# Socket timeout of each SSL handshake and WHOIS query, at most the budget, so a
+# probe the async path gave up on frees its thread soon after
+PROBE_TIMEOUT = float(os.environ.get('PHISHING_PROBE_TIMEOUT', 3.0))
+if PROBE_BUDGET > 0:
+    PROBE_TIMEOUT = min(PROBE_TIMEOUT, PROBE_BUDGET)
+# Probes still running in PROBE_EXECUTOR by (probe, hostname): a request for a
+# domain that is already being probed waits on that probe instead of starting another
+PROBES_IN_FLIGHT = {}
+PROBES_LOCK = threading.Lock()
+
+# TLS probe outcomes keyed by hostname
+SSL_CACHE = TTLCache(
+    maxsize=int(os.environ.get('SSL_CACHE_SIZE', 10000)),
+    ttl=int(os.environ.get('SSL_CACHE_MAX_AGE', 24 * 3600)),
+    negative_ttl=int(os.environ.get('SSL_NEGATIVE_TTL', 300))
+)
+
+# WHOIS creation dates keyed by registrable domain
+WHOIS_CACHE = TTLCache(
+    maxsize=int(os.environ.get('WHOIS_CACHE_SIZE', 10000)),
+    ttl=int(os.environ.get('WHOIS_CACHE_TTL', 7 * 24 * 3600)),
+    negative_ttl=int(os.environ.get('WHOIS_NEGATIVE_TTL', 600))
+)
+
+def registrable_domain(url):
+    ext = extract_domain(url)
+    return ext.domain + '.' + ext.suffix
+
+def check_ssl(hostname):
+    hostname = hostname.lower()
+    ssl_valid = SSL_CACHE.get(hostname)
+    if ssl_valid is not MISSING:
+        return ssl_valid
+    try:
+        context = ssl.create_default_context()
+        with socket.create_connection((hostname, 443), timeout=PROBE_TIMEOUT) as sock:
+            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
+                cert = ssock.getpeercert()
+        # A valid certificate is trusted until it expires or the max age passes
+        ttl = SSL_CACHE.ttl
+        if cert and cert.get('notAfter'):
+            ttl = min(ttl, ssl.cert_time_to_seconds(cert['notAfter']) - time.time())
+        if ttl > 0:
+            SSL_CACHE.set(hostname, True, ttl=ttl)
+        return True
+    except:
+        SSL_CACHE.set(hostname, False, ttl=SSL_CACHE.negative_ttl)
+        return False
+
+def lookup_creation_date(hostname):
+    hostname = hostname.lower()
+    creation_date = WHOIS_CACHE.get(hostname)
+    if creation_date is not MISSING:
+        return creation_date
+    try:
+        domain_info = whois.whois(hostname, timeout=PROBE_TIMEOUT)
+        creation_date = domain_info.creation_date
+        if isinstance(creation_date, list):
+            creation_date = creation_date[0]
+    except:
+        creation_date = None
+    if creation_date:
+        WHOIS_CACHE.set(hostname, creation_date)
+    else:
+        # Failed or empty lookups are retried sooner than real answers
+        creation_date = None
+        WHOIS_CACHE.set(hostname, None, ttl=WHOIS_CACHE.negative_ttl)
+    return creation_date
+
+def get_domain_age(hostname):
+    creation_date = lookup_creation_date(hostname)
+    if creation_date:
+        try:
+            return (datetime.datetime.now() - creation_date).days
+        except:
+            pass
+    return None
+
+def probe_domain(hostname):
+    return {'ssl_valid': check_ssl(hostname), 'domain_age': get_domain_age(hostname)}
+
+def submit_probe(name, probe, hostname):
+    key = (name, hostname.lower())
+    with PROBES_LOCK:
+        future = PROBES_IN_FLIGHT.get(key)
+        started = future is None
+        if started:
+            future = PROBES_IN_FLIGHT[key] = PROBE_EXECUTOR.submit(probe, hostname)
+    if started:
+        # Outside the lock: the callback runs right here if the probe already finished
+        future.add_done_callback(lambda done: forget_probe(key, done))
+    return future
+
+def forget_probe(key, future):
+    with PROBES_LOCK:
+        if PROBES_IN_FLIGHT.get(key) is future:
+            del PROBES_IN_FLIGHT[key]
+
+async def probe_domain_async(hostname, budget=PROBE_BUDGET):
+    probes = {
+        'ssl': asyncio.wrap_future(submit_probe('ssl', check_ssl, hostname)),
+        'whois': asyncio.wrap_future(submit_probe('whois', get_domain_age, hostname))
+    }
+    # Late probes keep running in the background and still fill the caches
+    await asyncio.wait(probes.values(), timeout=max(budget, 0))
+    return {
+        'ssl_valid': probes['ssl'].result() if probes['ssl'].done() else None,
+        'domain_age': probes['whois'].result() if probes['whois'].done() else None,
+        'timed_out': [name for name, probe in probes.items() if not probe.done()]
+    }
+
+def extract_lexical_features(url):
+    features = FeatureRecord()
+    ext = extract_domain(url)
+    url_length, domain_length = url_lengths(url)
+    features['URLLength'] = url_length
     if url_length < 20:
         features['url_length_score'] = 0.3
     elif url_length > 100:
         features['url_length_score'] = 0.4
     else:
         features['url_length_score'] = 0.0
-    features['Domain Length'] = len(ext.domain)
+    features['DomainLength'] = domain_length
     subdomains = ext.subdomain.split('.') if ext.subdomain else []
-    features['Number of Subdomains'] = len(subdomains)
-    features['subdomain_count_score'] = 0.0
+    features['subdomain_count'] = len(subdomains)
     if len(subdomains) >= 3:
         features['subdomain_count_score'] = 0.5
     elif len(subdomains) == 2:
         features['subdomain_count_score'] = 0.2
-    suspicious_subdomains = ['localhost', 'admin', 'secure', 'login', 'paypal', 'bank', 'update', 'signin', 'account']
-    found_suspicious_subdomain = any(s in subdomains for s in suspicious_subdomains)
+    # Keywords, shorteners and subdomain names are all found in one pass over the URL
+    hits = PHISHING_MATCHER.scan(url.lower())
+    found_suspicious_subdomain = any(s in hits['suspicious_subdomains'] for s in subdomains)
     features['suspicious_subdomain'] = found_suspicious_subdomain
     features['suspicious_subdomain_score'] = 0.7 if found_suspicious_subdomain else 0.0
-    features['punycode'] = url.startswith('xn--') or 'xn--' in url
-    features['punycode_score'] = 0.7 if features['punycode'] else 0.0
+    punycode = url.startswith('xn--') or 'xn--' in url
+    features['punycode'] = punycode
+    features['punycode_score'] = 0.7 if punycode else 0.0
     try:
         url.encode('ascii')
-        features['unicode_trick'] = False
-        features['unicode_trick_score'] = 0.0
     except UnicodeEncodeError:
         features['unicode_trick'] = True
         features['unicode_trick_score'] = 0.7
-    known_brands = ['paypal', 'google', 'apple', 'amazon', 'bank', 'microsoft']
-    features['brand_similarity'] = max([SequenceMatcher(None, ext.domain, brand).ratio() for brand in known_brands])
+    features.matched_brand, features['brand_similarity'] = BRAND_INDEX.best_match(ext.domain)
     special_chars = len(re.findall(r'[!@#$%^&*(),.?":{}|<>]', url))
-    features['Special Characters'] = special_chars
+    features['special_characters'] = special_chars
     if special_chars == 0:
         features['special_chars_score'] = 0.0
     elif special_chars <= 2:
@@ -73,11 +216,8 @@ def extract_features(url):
         features['special_chars_score'] = 0.5
     else:
         features['special_chars_score'] = 0.8
-    suspicious_keywords = ['secure', 'account', 'webscr', 'login', 'signin', 'bank', 'verify', 'update', 
-                         'password', 'confirm', 'paypal', 'wallet', 'support', 'security', 'click', 'update',
-                         'suspended', 'limited', 'verify', 'confirm', 'urgent', 'action', 'required']
-    keyword_count = sum(1 for keyword in suspicious_keywords if keyword in url.lower())
-    features['Suspicious Keywords'] = keyword_count
+    keyword_count = len(hits['suspicious_keywords'])
+    features['suspicious_keywords_found'] = keyword_count
     if keyword_count == 0:
         features['suspicious_words_score'] = 0.0
     elif keyword_count == 1:
@@ -86,146 +226,249 @@ def extract_features(url):
         features['suspicious_words_score'] = 0.6
     else:
         features['suspicious_words_score'] = 0.9
-    try:
-        hostname = ext.domain + '.' + ext.suffix
-        context = ssl.create_default_context()
-        with socket.create_connection((hostname, 443), timeout=3) as sock:
-            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                cert = ssock.getpeercert()
-                features['SSL Valid'] = True
-                features['ssl_valid_score'] = 0.0
-    except:
-        features['SSL Valid'] = False
-        features['ssl_valid_score'] = 0.8
-    try:
-        domain_info = whois.whois(ext.domain + '.' + ext.suffix)
-        if domain_info.creation_date:
-            if isinstance(domain_info.creation_date, list):
-                creation_date = domain_info.creation_date[0]
-            else:
-                creation_date = domain_info.creation_date
-            domain_age = (datetime.datetime.now() - creation_date).days
-            features['Domain Age (days)'] = domain_age
-            if domain_age < 30:
-                features['domain_age_score'] = 0.9
-            elif domain_age < 90:
-                features['domain_age_score'] = 0.6
-            elif domain_age < 365:
-                features['domain_age_score'] = 0.3
-            else:
-                features['domain_age_score'] = 0.0
-        else:
-            features['Domain Age (days)'] = 0
-            features['domain_age_score'] = 0.9
-    except:
-        features['Domain Age (days)'] = 0
-        features['domain_age_score'] = 0.9
     suspicious_tlds = ['xyz', 'top', 'cc', 'tk', 'ml', 'ga', 'cf', 'gq', 'pw', 'info', 'online', 'site', 'click']
-    features['Suspicious TLD'] = ext.suffix.lower() in suspicious_tlds
-    features['suspicious_tld_score'] = 0.8 if ext.suffix.lower() in suspicious_tlds else 0.0
-    features['Contains IP'] = bool(re.search(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', url))
-    features['ip_in_domain_score'] = 0.9 if features['Contains IP'] else 0.0
-    if 'localhost' in url.lower() or '127.0.0.1' in url or '192.168.' in url:
-        features['is_localhost'] = True
-        features['localhost_score'] = 0.0
+    suspicious_tld = ext.suffix.lower() in suspicious_tlds
+    features['suspicious_tld'] = suspicious_tld
+    features['suspicious_tld_score'] = 0.8 if suspicious_tld else 0.0
+    contains_ip = bool(re.search(r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', url))
+    features['contains_ip'] = contains_ip
+    features['ip_in_domain_score'] = 0.9 if contains_ip else 0.0
+    features['is_localhost'] = 'localhost' in url.lower() or '127.0.0.1' in url or '192.168.' in url
+    features['shortener_score'] = 0.8 if hits['shorteners'] else 0.0
+    return features
+
+def add_network_features(features, network):
+    # Probes that ran out of time or were skipped are left out (NaN) and scored as unknown
+    timed_out = network.get('timed_out', [])
+    unknown = timed_out + network.get('skipped', [])
+    features.timed_out_probes = timed_out
+    if 'ssl' in unknown:
+        features['ssl_valid'] = np.nan
+        features['ssl_valid_score'] = np.nan
     else:
-        features['is_localhost'] = False
-        features['localhost_score'] = 0.0
-    shorteners = ['bit.ly', 'tinyurl.com', 'goo.gl', 't.co', 'ow.ly', 'is.gd', 'buff.ly', 'adf.ly']
-    features['is_shortener'] = any(short in url for short in shorteners)
-    features['shortener_score'] = 0.8 if features['is_shortener'] else 0.0
+        features['ssl_valid'] = bool(network['ssl_valid'])
+        features['ssl_valid_score'] = 0.0 if network['ssl_valid'] else 0.8
+    domain_age = network['domain_age']
+    if 'whois' in unknown:
+        features['domain_age_days'] = np.nan
+        features['domain_age_score'] = np.nan
+    elif domain_age is not None:
+        features['domain_age_days'] = domain_age
+        if domain_age < 30:
+            features['domain_age_score'] = 0.9
+        elif domain_age < 90:
+            features['domain_age_score'] = 0.6
+        elif domain_age < 365:
+            features['domain_age_score'] = 0.3
+        else:
+            features['domain_age_score'] = 0.0
+    else:
+        features['domain_age_days'] = 0
+        features['domain_age_score'] = 0.9
     return features
 
-def calculate_phishing_probability(features):
-    if features.get('is_localhost', False):
-        return False, 5.0, 5.0, None
-    total_score = 0
-    max_score = 0
-    for feature, weight in PHISHING_WEIGHTS.items():
-        score_key = f"{feature}_score"
-        if score_key in features:
-            total_score += features[score_key] * weight
-            max_score += weight
-    total_score += features.get('subdomain_count_score', 0) * 0.1
-    max_score += 0.1
-    total_score += features.get('suspicious_subdomain_score', 0) * 0.2
-    max_score += 0.2
-    total_score += features.get('punycode_score', 0) * 0.2
-    max_score += 0.2
-    total_score += features.get('unicode_trick_score', 0) * 0.2
-    max_score += 0.2
-    total_score += features.get('shortener_score', 0) * 0.3
-    max_score += 0.3
-    known_brands = ['paypal', 'google', 'apple', 'amazon', 'bank', 'microsoft']
-    for brand in known_brands:
-        if features['brand_similarity'] > 0.8 and brand in features and brand not in features.get('domain', ''):
-            total_score += 0.7
-            max_score += 0.7
-            break
-        if features['brand_similarity'] > 0.8 and brand not in features.get('domain', '') and brand in features.get('domain', ''):
-            total_score += 0.7
-            max_score += 0.7
-            break
-    if max_score > 0:
-        rule_based_probability = (total_score / max_score) * 100
+def extract_features(url, network=None):
+    features = extract_lexical_features(url)
+    if network is None:
+        network = probe_domain(registrable_domain(url))
+    return add_network_features(features, network)
+
+def rule_based_probability(values):
+    # values is one feature vector or a (n, NUM_FEATURES) matrix; unknown (NaN)
+    # features drop out of both the score and the maximum
+    known = ~np.isnan(values)
+    total_score = np.where(known, values, 0) @ RULE_WEIGHT_VECTOR
+    max_score = known @ RULE_WEIGHT_VECTOR
+    return np.where(max_score > 0, total_score / np.where(max_score > 0, max_score, 1) * 100, 0)
+
+def ml_based_probability(model_input, model):
+    if model is None:
+        return None
+    try:
+        return model.predict_proba(model_input)[:, 1] * 100
+    except Exception as e:
+        return None
+
+def combine_probabilities(rule_probability, ml_probability):
+    if ml_probability is not None:
+        final_probability = (ml_probability * 0.6) + (rule_probability * 0.4)
     else:
-        rule_based_probability = 0
-    ml_probability = None
-    if ML_MODEL is not None:
+        final_probability = rule_probability
+    return final_probability > PHISHING_THRESHOLD, final_probability, rule_probability, ml_probability
+
+def model_probabilities(features_list, model):
+    # ML confidence of every URL from one predict_proba call on the stacked model
+    # columns (None for each without a model)
+    if not features_list:
+        return []
+    ml = ml_based_probability(np.vstack([features.model_input() for features in features_list]), model)
+    return [float(p) for p in ml] if ml is not None else [None] * len(features_list)
+
+def score_features(features, ml_probability):
+    if features['is_localhost']:
+        return False, 5.0, 5.0, None
+    return combine_probabilities(float(rule_based_probability(features.values)), ml_probability)
+
+def calculate_phishing_probability(features, model):
+    if features['is_localhost']:
+        return False, 5.0, 5.0, None
+    return score_features(features, model_probabilities([features], model)[0])
+
+def decide_lexically(features, ml_probability):
+    # Score the lexical features against every possible SSL/WHOIS outcome; if the
+    # verdict is the same for all of them the network stage cannot change it.
+    # Returns the outcome closest to the threshold, or None when the verdict can flip.
+    # The model columns do not depend on the network probes, so one ML confidence
+    # (from model_probabilities) serves every outcome and the network stage too.
+    if features['is_localhost']:
+        return score_features(features, ml_probability)
+    trials = np.tile(features.values, (len(NETWORK_OUTCOME_SCORES), 1))
+    trials[:, [COLUMN_INDEX['ssl_valid_score'], COLUMN_INDEX['domain_age_score']]] = NETWORK_OUTCOME_SCORES
+    rule_probabilities = rule_based_probability(trials)
+    outcomes = [combine_probabilities(float(rule_probability), ml_probability) for rule_probability in rule_probabilities]
+    if len({outcome[0] for outcome in outcomes}) > 1:
+        return None
+    return min(outcomes, key=lambda outcome: abs(outcome[1] - PHISHING_THRESHOLD))
+
+def render_features(features):
+    ssl_valid = features['ssl_valid']
+    domain_age = features['domain_age_days']
+    return {
+        'url_length': int(features['URLLength']),
+        'domain_length': int(features['DomainLength']),
+        'special_characters': int(features['special_characters']),
+        'suspicious_keywords_found': int(features['suspicious_keywords_found']),
+        'ssl_certificate': 'Unknown' if np.isnan(ssl_valid) else 'Valid' if ssl_valid else 'Invalid/Missing',
+        'domain_age_days': None if np.isnan(domain_age) else int(domain_age),
+        'contains_ip_address': bool(features['contains_ip']),
+        'suspicious_tld': bool(features['suspicious_tld']),
+        'subdomain_count': int(features['subdomain_count']),
+        'suspicious_subdomain': bool(features['suspicious_subdomain']),
+        'punycode_trick': bool(features['punycode']),
+        'unicode_trick': bool(features['unicode_trick']),
+        'brand_similarity': round(features['brand_similarity'], 4),
+        'matched_brand': features.matched_brand
+    }
+
+def build_response(url, features, decision, decided_by, model):
+    is_phishing, final_confidence, rule_confidence, ml_confidence = decision
+    return {
+        'url': url,
+        'is_phishing': bool(is_phishing),
+        'decided_by': decided_by,
+        'confidence': round(final_confidence, 2),
+        'rule_confidence': round(rule_confidence, 2) if rule_confidence is not None else None,
+        'ml_confidence': round(ml_confidence, 2) if ml_confidence is not None else None,
+        'model_version': model.version if model is not None and ml_confidence is not None else None,
+        'features': render_features(features),
+        'timed_out_probes': features.timed_out_probes
+    }
+
+def finish_check(url, features, ml_probability, model, network=None, decision=None):
+    # Network stage of a check whose lexical features and ML confidence are already
+    # known (the model columns do not depend on the probes)
+    if decision is not None:
+        add_network_features(features, NETWORK_SKIPPED)
+        return build_response(url, features, decision, 'lexical', model)
+    if network is None:
+        network = probe_domain(registrable_domain(url))
+    add_network_features(features, network)
+    return build_response(url, features, score_features(features, ml_probability), 'network', model)
+
+def check_phishing(url, network=None, staged=False, model=None):
+    if not url:
+        return {'error': 'No URL provided'}
+    url = normalize_url(url)
+    # The model version is fixed for the whole request, even if a reload swaps it meanwhile
+    model = model or ML_REGISTRY.current
+    try:
+        features = extract_lexical_features(url)
+        ml_probability = None if features['is_localhost'] else model_probabilities([features], model)[0]
+        # In staged mode the SSL/WHOIS probes only run when they could flip the verdict
+        decision = decide_lexically(features, ml_probability) if staged else None
+        return finish_check(url, features, ml_probability, model, network, decision)
+    except Exception as e:
+        return {'error': f'Error analyzing URL: {str(e)}'}
+
+def check_phishing_batch(urls, max_workers=BATCH_MAX_WORKERS, staged=False):
+    if not urls or not isinstance(urls, list):
+        return {'error': 'No URLs provided'}
+    if len(urls) > BATCH_MAX_URLS:
+        return {'error': f'Too many URLs (max {BATCH_MAX_URLS})'}
+    model = ML_REGISTRY.current
+    # Lexical features of every URL first, so the model scores the whole batch in
+    # one predict_proba call rather than one micro-batch window per URL
+    results = [None] * len(urls)
+    normalized, features = {}, {}
+    for i, url in enumerate(urls):
+        if not url or not isinstance(url, str):
+            results[i] = {'url': url, 'error': 'No URL provided'}
+            continue
         try:
-            ml_features = np.array([
-                features['url_length_score'],
-                features['special_chars_score'],
-                features['suspicious_words_score'],
-                features['ssl_valid_score'],
-                features['domain_age_score'],
-                features['suspicious_tld_score'],
-                features['ip_in_domain_score'],
-                features.get('subdomain_count_score', 0),
-                features.get('suspicious_subdomain_score', 0),
-                features.get('punycode_score', 0),
-                features.get('unicode_trick_score', 0)
-            ]).reshape(1, -1)
-            ml_probability = ML_MODEL.predict_proba(ml_features)[0][1] * 100
+            normalized[i] = normalize_url(url)
+            features[i] = extract_lexical_features(normalized[i])
         except Exception as e:
-            pass
-    if ml_probability is not None:
-        final_probability = (ml_probability * 0.6) + (rule_based_probability * 0.4)
-    else:
-        final_probability = rule_based_probability
-    is_phishing = final_probability > 30
-    return is_phishing, final_probability, rule_based_probability, ml_probability
+            results[i] = {'url': url, 'error': f'Error analyzing URL: {str(e)}'}
+    scored = [i for i in features if not features[i]['is_localhost']]
+    ml = dict(zip(scored, model_probabilities([features[i] for i in scored], model)))
+    # Staged: each URL's lexical verdict is decided here, once, with the batch's ML confidence
+    decisions = {i: decide_lexically(features[i], ml.get(i)) if staged else None for i in features}
+    # URLs on the same registrable domain share one SSL handshake and one WHOIS lookup
+    domains = []
+    for i in features:
+        if decisions[i] is None:
+            domain = registrable_domain(normalized[i])
+            if domain not in domains:
+                domains.append(domain)
+    network = {}
+    if domains:
+        workers = max(1, min(max_workers, 2 * len(domains)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ssl_futures = {domain: pool.submit(check_ssl, domain) for domain in domains}
+            age_futures = {domain: pool.submit(get_domain_age, domain) for domain in domains}
+            for domain in domains:
+                network[domain] = {
+                    'ssl_valid': ssl_futures[domain].result(),
+                    'domain_age': age_futures[domain].result()
+                }
+    for i in features:
+        try:
+            domain = registrable_domain(normalized[i])
+            results[i] = finish_check(normalized[i], features[i], ml.get(i), model, network.get(domain), decisions[i])
+        except Exception as e:
+            results[i] = {'url': urls[i], 'error': f'Error analyzing URL: {str(e)}'}
+    return {'results': results, 'domains_probed': len(domains)}
+
+def phishing_cache_stats():
+    return {'ssl': SSL_CACHE.stats(), 'whois': WHOIS_CACHE.stats(), 'hostnames': hostname_cache_stats()}
+
+def warm_up_ml_model():
+    # Loading already ran a warm-up prediction; this just makes sure a version is
+    # in place (and the watch thread running) before workers fork
+    return ML_REGISTRY.current is not None
+
+def phishing_ml_stats():
+    return ML_REGISTRY.status()
+
+def reload_ml_model(version=None):
+    return ML_REGISTRY.reload(version)
+
+async def extract_features_async(url, budget=PROBE_BUDGET):
+    network = await probe_domain_async(registrable_domain(url), budget)
+    return extract_features(url, network)
 
-def check_phishing(url):
+async def check_phishing_async(url, budget=PROBE_BUDGET, staged=False):
     if not url:
         return {'error': 'No URL provided'}
-    if not url.startswith(('http://', 'https://')):
-        url = 'http://' + url
+    url = normalize_url(url)
+    model = ML_REGISTRY.current
     try:
-        features = extract_features(url)
-        is_phishing, final_confidence, rule_confidence, ml_confidence = calculate_phishing_probability(features)
-        response = {
-            'url': url,
-            'is_phishing': is_phishing,
-            'confidence': round(final_confidence, 2),
-            'rule_confidence': round(rule_confidence, 2) if rule_confidence is not None else None,
-            'ml_confidence': round(ml_confidence, 2) if ml_confidence is not None else None,
-            'features': {
-                'url_length': features['URL Length'],
-                'domain_length': features['Domain Length'],
-                'special_characters': features['Special Characters'],
-                'suspicious_keywords_found': features['Suspicious Keywords'],
-                'ssl_certificate': 'Valid' if features['SSL Valid'] else 'Invalid/Missing',
-                'domain_age_days': features['Domain Age (days)'],
-                'contains_ip_address': features['Contains IP'],
-                'suspicious_tld': features.get('Suspicious TLD', False),
-                'subdomain_count': features['Number of Subdomains'],
-                'suspicious_subdomain': features['suspicious_subdomain'],
-                'punycode_trick': features['punycode'],
-                'unicode_trick': features['unicode_trick'],
-                'brand_similarity': features['brand_similarity']
-            }
-        }
-        return response
+        features = extract_lexical_features(url)
+        ml_probability = None if features['is_localhost'] else model_probabilities([features], model)[0]
+        decision = decide_lexically(features, ml_probability) if staged else None
+        if decision is not None:
+            return finish_check(url, features, ml_probability, model, decision=decision)
+        network = await probe_domain_async(registrable_domain(url), budget)
+        return finish_check(url, features, ml_probability, model, network)
     except Exception as e:
-        return {'error': f'Error analyzing URL: {str(e)}'} 
\ No newline at end of file
+        return {'error': f'Error analyzing URL: {str(e)}'}
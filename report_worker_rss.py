@@ -0,0 +1,77 @@
+# report_worker_rss.py
+import argparse
+import os
+import subprocess
+import sys
+import time
+from forest_engine import export_forest, export_is_current
+
+# Started once per simulated worker: load the model, touch every array (as a worker
+# does after serving traffic for a while) and wait to be measured
+WORKER = '''
+import sys
+import numpy as np
+from forest_engine import load_model
+model = load_model(sys.argv[1])
+for array in getattr(model, 'arrays', {}).values():
+    np.asarray(array).sum()
+print('ready', flush=True)
+sys.stdin.read()
+'''
+
+def memory_kb(pid):
+    # Rss counts shared pages in full for every process; Pss splits them between
+    # the processes mapping them, so summed Pss is the real footprint on the host
+    usage = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:', 'Shared_Clean:', 'Private_Dirty:'):
+                usage[parts[0][:-1]] = int(parts[1])
+    return usage
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+def print_report(title, pids):
+    print(title)
+    total_pss = 0
+    for pid in pids:
+        usage = memory_kb(pid)
+        total_pss += usage['Pss']
+        print(f"  pid {pid}: rss {usage['Rss'] / 1024:7.1f} MB  pss {usage['Pss'] / 1024:7.1f} MB  "
+              f"shared {usage['Shared_Clean'] / 1024:7.1f} MB  private {usage['Private_Dirty'] / 1024:7.1f} MB")
+    print(f'  total pss: {total_pss / 1024:.1f} MB')
+
+def simulate(model_path, workers, mmap):
+    env = dict(os.environ, MODEL_MMAP='1' if mmap else '0', PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    processes = [
+        subprocess.Popen([sys.executable, '-c', WORKER, model_path], env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            process.stdout.readline()
+        time.sleep(0.2)
+        print_report(f"{workers} workers, {'memory-mapped' if mmap else 'private copy'} ({model_path})", [p.pid for p in processes])
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-worker memory with private vs memory-mapped model arrays')
+    parser.add_argument('--model', default='phishing_model.pkl')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--gunicorn-pid', type=int, help='Report the workers of a running gunicorn master instead')
+    args = parser.parse_args()
+
+    if args.gunicorn_pid:
+        print_report(f'gunicorn master {args.gunicorn_pid}', [args.gunicorn_pid] + children(args.gunicorn_pid))
+    else:
+        # Export up front so both runs load the same arrays: privately or mapped
+        if not export_is_current(args.model):
+            export_forest(args.model)
+        simulate(args.model, args.workers, mmap=False)
+        simulate(args.model, args.workers, mmap=True)
@@ -0,0 +1,482 @@
+# rule_engine.py
+import bisect
+import functools
+import itertools
+import json
+import os
+import string
+import numpy as np
+from rule_messages import messages_for, option_text
+
+# Declarative versions of the recommend_* rules, one JSON file per rule set:
+#   inputs    name -> {field, type: option|float|int, default}
+#   steps     run in order:
+#             {"derive": {name: expression}}
+#             {"table": [{"when": conditions, "set": {name: value}}, ...]}  first match wins
+#             {"messages": [{"when": conditions, "<list>": [message ids]}, ...]}  every match appends
+#   response  the response shape: "$name", {"round": name, "digits": n}, {"message": id, "args": {...}},
+#             {"option": name, "messages": {...}}, {"list": name}, or literal values
+# Conditions map a name to a value (equality), a list (membership) or {op: value}
+# with op in < <= > >= == "not in"; several names must all hold, {"any": [...]}
+# holds if one of its conditions does. Set values are numbers, {"message": id}
+# or {"expr": expression}.
+RULES_DIR = os.environ.get('RULES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules'))
+
+NUMERIC_OPS = {'<', '<=', '>', '>=', '=='}
+OPTION_OPS = {'in', 'not in'}
+
+def ratio(a, b):
+    return a / b if b > 0 else 0
+
+def vector_ratio(a, b):
+    return np.where(b > 0, a / np.where(b > 0, b, 1), 0)
+
+# Expressions are plain Python arithmetic; the same source runs on scalars for
+# one request and on NumPy columns for a batch
+SCALAR_FUNCTIONS = {'__builtins__': {}, 'maximum': max, 'minimum': min, 'ratio': ratio, 'where': lambda c, a, b: a if c else b}
+VECTOR_FUNCTIONS = {'__builtins__': {}, 'maximum': np.maximum, 'minimum': np.minimum, 'ratio': vector_ratio, 'where': np.where}
+
+def round_like_python(values, digits):
+    # np.round matches round() except where values * 10**digits lands within
+    # rounding error of a .5 tie (or is too large to tell); those are redone with round()
+    values = np.asarray(values)
+    if values.dtype.kind in 'iub':
+        return values
+    scaled = values * 10.0 ** digits
+    rounded = np.round(values, digits)
+    unsure = np.nonzero(np.abs(scaled - np.floor(scaled) - 0.5) <= np.abs(scaled) * 1e-15 + 1e-12)
+    if len(unsure[0]):
+        rounded[unsure] = [round(float(value), digits) for value in values[unsure]]
+    return rounded
+
+def parse_condition(when):
+    # -> ('all' | 'any', [nodes]) with ('test', name, op, value) leaves
+    nodes = []
+    for name, test in when.items():
+        if name == 'any':
+            nodes.append(('any', [parse_condition(option) for option in test]))
+        elif isinstance(test, dict):
+            nodes += [('test', name, op, value) for op, value in test.items()]
+        elif isinstance(test, list):
+            nodes.append(('test', name, 'in', test))
+        else:
+            nodes.append(('test', name, '==', test))
+    return ('all', nodes)
+
+def condition_tests(node):
+    if node[0] == 'test':
+        yield node
+    else:
+        for child in node[1]:
+            yield from condition_tests(child)
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+class Decision:
+    # First matching condition for every input, precomputed. Each numeric input
+    # is cut into bands at the thresholds the conditions use (below t, equal to
+    # t, between thresholds, ...) and each option input into the values they
+    # name plus "anything else"; the outcome of every combination of bands is
+    # stored in a flat table, so evaluating is a band lookup and one index.
+    def __init__(self, conditions):
+        self.conditions = [parse_condition(when) if when is not None else None for when in conditions]
+        self.thresholds, self.options = {}, {}
+        for condition in filter(None, self.conditions):
+            for _, name, op, value in condition_tests(condition):
+                if op in NUMERIC_OPS and (op != '==' or is_number(value)):
+                    if name in self.options:
+                        raise Exception(f'{name} is compared both as a number and as an option')
+                    self.thresholds.setdefault(name, set()).add(value)
+                elif op in OPTION_OPS or op == '==':
+                    if name in self.thresholds:
+                        raise Exception(f'{name} is compared both as a number and as an option')
+                    values = self.options.setdefault(name, [])
+                    values += [v for v in (value if op in OPTION_OPS else [value]) if v not in values]
+                else:
+                    raise Exception(f'unknown operator {op!r} for {name}')
+        self.thresholds = {name: sorted(values) for name, values in self.thresholds.items()}
+        self.threshold_arrays = {name: np.array(values) for name, values in self.thresholds.items()}
+        self.option_codes = {name: {value: code for code, value in enumerate(values)} for name, values in self.options.items()}
+        self.names = sorted(self.thresholds) + sorted(self.options)
+        sizes = [2 * len(self.thresholds[name]) + 1 if name in self.thresholds else len(self.options[name]) + 1 for name in self.names]
+        self.strides = [int(np.prod(sizes[i + 1:])) for i in range(len(sizes))]
+        table = []
+        for bands in itertools.product(*[range(size) for size in sizes]):
+            bands = dict(zip(self.names, bands))
+            match = next((i for i, condition in enumerate(self.conditions) if condition is None or self.holds(condition, bands)), None)
+            if match is None:
+                raise Exception(f'no rule matches {self.describe(bands)}')
+            table.append(match)
+        self.table = np.array(table, dtype=np.int16)
+        self.outcomes = table
+
+    def holds(self, node, bands):
+        if node[0] == 'all':
+            return all(self.holds(child, bands) for child in node[1])
+        if node[0] == 'any':
+            return any(self.holds(child, bands) for child in node[1])
+        _, name, op, value = node
+        band = bands[name]
+        if name in self.thresholds:
+            # Band 2j + 1 is "equal to threshold j", 2j and 2j + 2 are either side of it
+            j = 2 * self.thresholds[name].index(value)
+            return {'<': band <= j, '<=': band <= j + 1, '>': band >= j + 2, '>=': band >= j + 1, '==': band == j + 1}[op]
+        codes = [self.options[name].index(v) for v in (value if op in OPTION_OPS else [value])]
+        return (band in codes) != (op == 'not in')
+
+    def describe(self, bands):
+        return ', '.join(f'{name} band {band}' for name, band in bands.items())
+
+    def band(self, name, value):
+        if name in self.thresholds:
+            thresholds = self.thresholds[name]
+            i = bisect.bisect_left(thresholds, value)
+            return 2 * i + (i < len(thresholds) and thresholds[i] == value)
+        try:
+            return self.option_codes[name].get(value, len(self.options[name]))
+        except TypeError:
+            # Unhashable input (a list or dict) never equals an option
+            return len(self.options[name])
+
+    def band_columns(self, name, values):
+        if name in self.thresholds:
+            thresholds = self.threshold_arrays[name]
+            i = np.searchsorted(thresholds, values, 'left')
+            return 2 * i + (thresholds[np.minimum(i, len(thresholds) - 1)] == values)
+        codes = np.full(values.shape, len(self.options[name]), dtype=np.int64)
+        for code, option in enumerate(self.options[name]):
+            codes[values == option] = code
+        return codes
+
+    def bands(self, env):
+        return tuple(self.band(name, env[name]) for name in self.names)
+
+    def evaluate(self, env):
+        return self.outcomes[sum(self.band(name, env[name]) * stride for name, stride in zip(self.names, self.strides))]
+
+    def evaluate_columns(self, env, n):
+        # Each input is banded at its own shape (a column, a scalar, or one axis of
+        # a grid) and the bands are broadcast together, so an outcome that only
+        # depends on one grid axis stays the size of that axis
+        index = np.int64(0)
+        for name, stride in zip(self.names, self.strides):
+            index = index + self.band_columns(name, np.asarray(env[name])) * stride
+        return self.table[index]
+
+class Derive:
+    def __init__(self, expressions):
+        self.expressions = [(name, expression, compile(expression, f'<{name}>', 'eval')) for name, expression in expressions.items()]
+
+    def run(self, env, lists):
+        for name, _, code in self.expressions:
+            env[name] = eval(code, SCALAR_FUNCTIONS, env)
+
+    def run_columns(self, env, lists, n):
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for name, _, code in self.expressions:
+                env[name] = eval(code, VECTOR_FUNCTIONS, env)
+
+class Table:
+    def __init__(self, rules):
+        self.decision = Decision([rule.get('when') for rule in rules])
+        names = list(rules[0]['set'])
+        for rule in rules:
+            if sorted(rule['set']) != sorted(names):
+                raise Exception(f'every rule of a table must set {names}, got {sorted(rule["set"])}')
+        # name -> per-rule values; message values are kept as ids and rendered last
+        self.values = {name: [rule['set'][name] for rule in rules] for name in names}
+        self.messages = {name for name, values in self.values.items() if isinstance(values[0], dict) and 'message' in values[0]}
+        self.codes = {name: [compile(value['expr'], f'<{name}>', 'eval') if isinstance(value, dict) and 'expr' in value else None
+                             for value in values] for name, values in self.values.items()}
+
+    def run(self, env, lists):
+        rule = self.decision.evaluate(env)
+        for name, values in self.values.items():
+            value = values[rule]
+            if name in self.messages:
+                env[name] = value['message']
+            elif self.codes[name][rule] is not None:
+                env[name] = eval(self.codes[name][rule], SCALAR_FUNCTIONS, env)
+            else:
+                env[name] = value
+
+    def run_columns(self, env, lists, n):
+        rules = self.decision.evaluate_columns(env, n)
+        for name, values in self.values.items():
+            if name in self.messages:
+                # Message values become indices into the table's ids
+                env[name] = MessageColumn([value['message'] for value in values], rules)
+            elif any(code is not None for code in self.codes[name]):
+                with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                    choices = [np.broadcast_to(eval(code, VECTOR_FUNCTIONS, env) if code is not None else value, n)
+                               for value, code in zip(values, self.codes[name])]
+                env[name] = np.choose(rules, choices)
+            else:
+                env[name] = np.array(values)[rules]
+
+class Messages:
+    def __init__(self, entries):
+        self.entries = []
+        for entry in entries:
+            appends = [(name, ids) for name, ids in entry.items() if name != 'when']
+            self.entries.append((Decision([entry['when'], None]), appends))
+        self.lists = sorted({name for _, appends in self.entries for name, _ in appends})
+
+    def run(self, env, lists):
+        for decision, appends in self.entries:
+            if decision.evaluate(env) == 0:
+                for name, ids in appends:
+                    lists[name] += ids
+
+    def run_columns(self, env, lists, n):
+        for decision, appends in self.entries:
+            mask = decision.evaluate_columns(env, n) == 0
+            for name, ids in appends:
+                lists[name] += [(message_id, mask) for message_id in ids]
+
+class MessageColumn:
+    # A column of message ids: ids[codes[row]]
+    def __init__(self, ids, codes):
+        self.ids = ids
+        self.codes = codes
+
+    def render(self, t):
+        return np.array([t(message_id) for message_id in self.ids], dtype=object)[self.codes]
+
+def is_constant(node):
+    # Response nodes that render the same for every row
+    if isinstance(node, dict):
+        return 'message' in node and 'args' not in node
+    return not isinstance(node, list) and not (isinstance(node, str) and node.startswith('$'))
+
+def response_names(node):
+    # Names a response template shows directly ("$name", rounded values, message args, options)
+    if isinstance(node, dict):
+        if 'round' in node:
+            yield node['round']
+        elif 'message' in node:
+            yield from node.get('args', {}).values()
+        elif 'option' in node:
+            yield node['option']
+        elif 'list' not in node:
+            for value in node.values():
+                yield from response_names(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from response_names(value)
+    elif isinstance(node, str) and node.startswith('$'):
+        yield node[1:]
+
+def format_column(template, columns, n):
+    # template.format(**row) for every row, built column-wise
+    out = np.full(n, '', dtype=object)
+    for literal, field, _, _ in string.Formatter().parse(template):
+        if literal:
+            out = out + literal
+        if field is not None:
+            out = out + np.broadcast_to(columns[field], n).astype(str).astype(object)
+    return out
+
+class RuleSet:
+    def __init__(self, spec, name=None):
+        self.name = name
+        self.inputs = spec['inputs']
+        self.steps = []
+        self.lists = set()
+        for step in spec['steps']:
+            if 'derive' in step:
+                self.steps.append(Derive(step['derive']))
+            elif 'table' in step:
+                self.steps.append(Table(step['table']))
+            elif 'messages' in step:
+                self.steps.append(Messages(step['messages']))
+                self.lists.update(self.steps[-1].lists)
+            else:
+                raise Exception(f'unknown step {sorted(step)}')
+        self.response = spec['response']
+        self.message_names = set().union(*[step.messages for step in self.steps if isinstance(step, Table)])
+        # For cache_key: inputs that are shown or computed with need their exact value;
+        # the others only matter through the band they fall in across all conditions
+        exact = set(response_names(self.response))
+        for step in self.steps:
+            codes = [code for _, _, code in step.expressions] if isinstance(step, Derive) else []
+            if isinstance(step, Table):
+                codes = [code for values in step.codes.values() for code in values if code is not None]
+            exact.update(name for code in codes for name in code.co_names)
+        self.key_thresholds, self.key_options = {}, {}
+        for name in self.inputs:
+            if name in exact:
+                continue
+            thresholds = set().union(*[decision.thresholds.get(name, []) for decision in self.decisions()])
+            if thresholds:
+                self.key_thresholds[name] = sorted(thresholds)
+            else:
+                options = [option for decision in self.decisions() for option in decision.options.get(name, [])]
+                self.key_options[name] = {option: code for code, option in enumerate(dict.fromkeys(options))}
+
+    def decisions(self):
+        for step in self.steps:
+            if isinstance(step, Table):
+                yield step.decision
+            elif isinstance(step, Messages):
+                yield from (decision for decision, _ in step.entries)
+
+    def read_inputs(self, data):
+        env = {}
+        for name, spec in self.inputs.items():
+            value = data.get(spec['field'], spec.get('default'))
+            if spec['type'] == 'float':
+                value = float(value)
+            elif spec['type'] == 'int':
+                value = int(value)
+            env[name] = value
+        return env
+
+    def cache_key(self, data):
+        # Requests with equal keys get the same response in every language: the band
+        # of each input the rules only compare, the exact value (and type) of the rest.
+        # None if the request can't be keyed (bad types, NaN, unhashable values).
+        try:
+            env = self.read_inputs(data)
+        except (AttributeError, TypeError, ValueError):
+            return None
+        key = []
+        for name, value in env.items():
+            if name in self.key_thresholds:
+                if value != value:
+                    return None
+                thresholds = self.key_thresholds[name]
+                i = bisect.bisect_left(thresholds, value)
+                key.append(2 * i + (i < len(thresholds) and thresholds[i] == value))
+            elif name in self.key_options:
+                try:
+                    key.append(self.key_options[name].get(value, -1))
+                except TypeError:
+                    key.append(-1)
+            else:
+                # repr keeps -0.0 apart from 0.0, which render differently
+                key.append((type(value), repr(value) if isinstance(value, float) else value))
+        key = tuple(key)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def evaluate(self, data, lang='en'):
+        # One request: same result as the hand-written recommend_*_logic(data, lang)
+        env = self.read_inputs(data)
+        lists = {name: [] for name in self.lists}
+        for step in self.steps:
+            step.run(env, lists)
+        return self.render(self.response, env, lists, messages_for(lang))
+
+    def render(self, node, env, lists, t):
+        if isinstance(node, dict):
+            if 'round' in node:
+                return round(env[node['round']], node['digits'])
+            if 'message' in node:
+                return t(node['message'], **{arg: env[name] for arg, name in node.get('args', {}).items()})
+            if 'option' in node:
+                return option_text(t, env[node['option']], node['messages'])
+            if 'list' in node:
+                return [t(message_id) for message_id in lists[node['list']]]
+            return {key: self.render(value, env, lists, t) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self.render(value, env, lists, t) for value in node]
+        if isinstance(node, str) and node.startswith('$'):
+            name = node[1:]
+            return t(env[name]) if name in self.message_names else env[name]
+        return node
+
+    def read_columns(self, columns, n):
+        env = {}
+        for name, spec in self.inputs.items():
+            if spec['field'] in columns:
+                values = np.asarray(columns[spec['field']])
+            else:
+                values = np.full(n, spec.get('default'), dtype=object if spec['type'] == 'option' else None)
+            if spec['type'] == 'float':
+                values = values.astype(np.float64)
+            elif spec['type'] == 'int':
+                values = values if values.dtype.kind in 'iu' else values.astype(np.float64)
+                values = values.astype(np.int64)
+            elif values.dtype != object:
+                values = values.astype(object)
+            env[name] = values
+        return env
+
+    def evaluate_columns(self, columns, lang='en', n=None, paths=None):
+        # Many profiles at once. columns maps request field names (monthlyIncome, ...)
+        # to equal-length arrays (a dict or a DataFrame); missing fields take the
+        # default. Returns {dotted response path: column}, only for the given paths
+        # if any; list fields are object columns of lists. n can also be a grid shape
+        # with one input per axis (shapes like (k, 1, 1)), except for list fields.
+        if n is None:
+            n = len(columns) if hasattr(columns, 'columns') else len(next(iter(columns.values())))
+        env = self.read_columns(columns, n)
+        lists = {name: [] for name in self.lists}
+        for step in self.steps:
+            step.run_columns(env, lists, n)
+        out = {}
+        self.render_columns(self.response, env, lists, messages_for(lang), n, '', out, paths)
+        return out
+
+    def render_columns(self, node, env, lists, t, n, path, out, paths=None):
+        if isinstance(node, dict) and not {'round', 'message', 'option', 'list'} & set(node):
+            for key, value in node.items():
+                self.render_columns(value, env, lists, t, n, f'{path}.{key}' if path else key, out, paths)
+            return
+        if paths is None or path in paths:
+            out[path] = self.render_column(node, env, lists, t, n)
+
+    def render_column(self, node, env, lists, t, n):
+        if isinstance(node, dict):
+            if 'round' in node:
+                return round_like_python(np.broadcast_to(env[node['round']], n), node['digits'])
+            if 'message' in node:
+                if 'args' not in node:
+                    return np.full(n, t(node['message']), dtype=object)
+                return format_column(t(node['message'], **{arg: '{' + arg + '}' for arg in node['args']}),
+                                     {arg: env[name] for arg, name in node['args'].items()}, n)
+            if 'option' in node:
+                values = np.broadcast_to(env[node['option']], n)
+                out = values.copy()
+                for option, message_id in node['messages'].items():
+                    out[values == option] = t(message_id)
+                return out
+            # Rows that got the same messages share one list: each row is keyed by
+            # the bitmask of its messages and only the distinct keys are rendered
+            entries = lists[node['list']]
+            keys = np.zeros(n, dtype=np.int64)
+            for bit, (_, mask) in enumerate(entries):
+                keys |= mask.astype(np.int64) << bit
+            unique, inverse = np.unique(keys, return_inverse=True)
+            texts = [t(message_id) for message_id, _ in entries]
+            rendered = np.empty(len(unique), dtype=object)
+            for i, key in enumerate(unique.tolist()):
+                rendered[i] = [text for bit, text in enumerate(texts) if key >> bit & 1]
+            return rendered[inverse]
+        if isinstance(node, list):
+            out = np.empty(n, dtype=object)
+            if all(is_constant(value) for value in node):
+                out.fill(self.render(node, {}, {}, t))
+                return out
+            columns = [self.render_column(value, env, lists, t, n) for value in node]
+            for i, row in enumerate(zip(*columns)):
+                out[i] = list(row)
+            return out
+        if isinstance(node, str) and node.startswith('$'):
+            value = env[node[1:]]
+            return np.broadcast_to(value.render(t) if isinstance(value, MessageColumn) else value, n)
+        return np.full(n, node, dtype=object)
+
+def load_spec(name, rules_dir=RULES_DIR):
+    with open(os.path.join(rules_dir, f'{name}.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+@functools.lru_cache(maxsize=None)
+def get_rules(name):
+    # Compiled once per process: account_type, savings_method, budget, credit_score, insurance
+    return RuleSet(load_spec(name), name)
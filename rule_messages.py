@@ -0,0 +1,34 @@
+# rule_messages.py
+import json
+import os
+
+# Compiled catalogs from build_message_catalogs.py: {lang: {message_id: text}}.
+# Every catalog has every message id (missing translations were filled with
+# English at build time), so rendering is a dict lookup and never a network call.
+COMPILED_DIR = os.environ.get('RULE_MESSAGES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'messages', 'compiled'))
+
+def load_catalogs(compiled_dir=COMPILED_DIR):
+    catalogs = {}
+    for name in sorted(os.listdir(compiled_dir)):
+        if name.startswith('rules_') and name.endswith('.json'):
+            with open(os.path.join(compiled_dir, name), encoding='utf-8') as f:
+                catalogs[name[len('rules_'):-len('.json')]] = json.load(f)
+    return catalogs
+
+CATALOGS = load_catalogs()
+LOCALES = sorted(CATALOGS)
+
+def has_catalog(lang):
+    return isinstance(lang, str) and lang in CATALOGS
+
+def messages_for(lang='en'):
+    # Returns t(message_id, **placeholders) -> text in lang (English if lang has no catalog)
+    catalog = CATALOGS.get(lang, CATALOGS['en'])
+    def t(message_id, **args):
+        text = catalog[message_id]
+        return text.format(**args) if args else text
+    return t
+
+def option_text(t, value, message_ids):
+    # Localizes an echoed input value (e.g. 'Good') when it is one of the known options
+    return t(message_ids[value]) if isinstance(value, str) and value in message_ids else value
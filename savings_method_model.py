@@ -1,10 +1,12 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from rule_messages import messages_for
 
 app = Flask(__name__)
 CORS(app)
 
-def recommend_savings_method_logic(data):
+def recommend_savings_method_logic(data, lang='en'):
+    t = messages_for(lang)
     goal = data.get('goal')
     amount = float(data.get('amount', 0))
     duration = int(data.get('duration', 0))  # in months
@@ -14,28 +16,28 @@ def recommend_savings_method_logic(data):
     # Simple rules-based logic (replace with ML model if available)
     if risk == 'Low':
         if deposit_frequency == 'Once' and duration >= 12:
-            method = 'Fixed Deposit (FD)'
-            reason = 'FDs are best for lump-sum, low-risk, long-term savings.'
+            method = t('productFixedDeposit')
+            reason = t('savingsReasonFd')
         elif deposit_frequency == 'Monthly' and duration >= 12:
-            method = 'Recurring Deposit (RD)'
-            reason = 'RDs are ideal for regular monthly savings with low risk.'
+            method = t('productRecurringDeposit')
+            reason = t('savingsReasonRd')
         else:
-            method = 'Savings Account'
-            reason = 'For short-term or flexible savings, a Savings Account is suitable.'
+            method = t('productSavingsAccount')
+            reason = t('savingsReasonSavingsAccount')
     elif risk == 'Medium':
         if duration >= 24:
-            method = 'Debt Mutual Fund'
-            reason = 'Debt funds offer moderate returns with moderate risk for longer durations.'
+            method = t('productDebtFund')
+            reason = t('savingsReasonDebtFundLong')
         else:
-            method = 'RD or FD'
-            reason = 'For medium risk and shorter durations, RD or FD is recommended.'
+            method = t('productRdOrFd')
+            reason = t('savingsReasonRdOrFd')
     else:  # High risk
         if duration >= 36:
-            method = 'Equity Mutual Fund'
-            reason = 'For high risk and long-term, equity funds can offer higher returns.'
+            method = t('productEquityFund')
+            reason = t('savingsReasonEquityFund')
         else:
-            method = 'Debt Mutual Fund'
-            reason = 'For high risk but short-term, debt funds are safer.'
+            method = t('productDebtFund')
+            reason = t('savingsReasonDebtFundShort')
     return {'recommended_method': method, 'reason': reason}
 
 @app.route('/recommend_savings_method', methods=['POST'])
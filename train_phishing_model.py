@@ -1,17 +1,15 @@
-import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 import joblib
+from feature_spec import MODEL_COLUMNS
+from feature_store import build, load_frame
 
-# Load enhanced dataset
-csv_file = 'enhanced_phishing_dataset.csv'
-df = pd.read_csv(csv_file)
+# Bring the feature store up to date (only changed extractors and new rows are
+# recomputed), then load the feature matrix from it
+build()
+df = load_frame(MODEL_COLUMNS + ['label'])
 
-# Feature columns for training (add/remove as needed)
-feature_cols = [
-    'URLLength', 'DomainLength', 'subdomain_count', 'suspicious_subdomain',
-    'punycode', 'unicode_trick', 'brand_similarity',
-    'special_characters', 'suspicious_keywords_found', 'shortener_score'
-]
+# Feature columns shared with serving (see feature_spec.py)
+feature_cols = MODEL_COLUMNS
 
 # Fallback for column names if needed
 for col in feature_cols:
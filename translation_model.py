@@ -1,8 +1,159 @@
-def translate_text(text, target_lang='en'):
-    try:
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from ttl_cache import TTLCache, MISSING
+
+# Translations are cached per (text, target_lang): first in an in-process LRU, then
+# in a SQLite file shared by every worker on the host. Responses are built from a
+# fixed set of strings, so after warm-up nearly every lookup is a memory hit.
+TRANSLATION_CACHE_SIZE = int(os.environ.get('TRANSLATION_CACHE_SIZE', 20000))
+TRANSLATION_CACHE_DB = os.environ.get('TRANSLATION_CACHE_DB', 'translation_cache.sqlite3')
+
+# Overall deadline (seconds) for translating one response. Backend calls that miss
+# it keep running in the background and still fill the caches.
+TRANSLATION_DEADLINE = float(os.environ.get('TRANSLATION_DEADLINE', 1.5))
+# Per-call network timeout, so a hung backend can't hold a pool thread forever
+TRANSLATION_TIMEOUT = float(os.environ.get('TRANSLATION_TIMEOUT', 10))
+TRANSLATION_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get('TRANSLATION_WORKERS', 16)))
+
+TRANSLATION_CACHE = TTLCache(maxsize=TRANSLATION_CACHE_SIZE)
+TRANSLATION_STATS = {'disk_hits': 0, 'backend_calls': 0, 'backend_failures': 0, 'deadline_misses': 0}
+
+_local = threading.local()
+# (text, target_lang) -> future of a backend call that hasn't finished yet
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+def get_translator():
+    # googletrans clients aren't thread-safe: one per pool thread (rebuilt after fork)
+    if getattr(_local, 'translator_pid', None) != os.getpid():
         from googletrans import Translator
-        translator = Translator()
-        translated = translator.translate(text, dest=target_lang)
-        return translated.text
+        _local.translator = Translator(timeout=TRANSLATION_TIMEOUT)
+        _local.translator_pid = os.getpid()
+    return _local.translator
+
+def get_db():
+    # sqlite3 connections can't cross threads (or forks), so each thread opens its own
+    if getattr(_local, 'pid', None) != os.getpid():
+        db = sqlite3.connect(TRANSLATION_CACHE_DB, timeout=5)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('CREATE TABLE IF NOT EXISTS translations (text TEXT, lang TEXT, translated TEXT, PRIMARY KEY (text, lang))')
+        _local.db = db
+        _local.pid = os.getpid()
+    return _local.db
+
+def read_translation(text, target_lang):
+    try:
+        row = get_db().execute('SELECT translated FROM translations WHERE text = ? AND lang = ?', (text, target_lang)).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def store_translation(text, target_lang, translated):
+    TRANSLATION_CACHE.set((text, target_lang), translated)
+    try:
+        with get_db() as db:
+            db.execute('INSERT OR REPLACE INTO translations VALUES (?, ?, ?)', (text, target_lang, translated))
+    except sqlite3.Error:
+        pass
+
+def cached_translation(text, target_lang):
+    # Memory, then disk; None on a miss
+    key = (text, target_lang)
+    translated = TRANSLATION_CACHE.get(key)
+    if translated is not MISSING:
+        return translated
+    translated = read_translation(text, target_lang)
+    if translated is not None:
+        TRANSLATION_STATS['disk_hits'] += 1
+        TRANSLATION_CACHE.set(key, translated)
+    return translated
+
+def supported_language(target_lang):
+    # The lookup googletrans does on dest before calling the backend: any other
+    # value fails on every call, so it would never leave translation_pending
+    if not isinstance(target_lang, str):
+        return False
+    from googletrans.constants import LANGCODES, LANGUAGES, SPECIAL_CASES
+    lang = target_lang.lower().split('_', 1)[0]
+    return lang in LANGUAGES or lang in SPECIAL_CASES or lang in LANGCODES
+
+def fetch_translation(text, target_lang):
+    # None if the backend failed; failures are not cached, so the next request tries again
+    TRANSLATION_STATS['backend_calls'] += 1
+    try:
+        translated = get_translator().translate(text, dest=target_lang).text
     except Exception as e:
-        return text  # fallback to original text if error 
\ No newline at end of file
+        TRANSLATION_STATS['backend_failures'] += 1
+        return None
+    store_translation(text, target_lang, translated)
+    return translated
+
+def submit_translation(text, target_lang):
+    # Identical strings requested while a call is in flight share that call
+    key = (text, target_lang)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is None:
+            future = TRANSLATION_EXECUTOR.submit(fetch_translation, text, target_lang)
+            _in_flight[key] = future
+            future.add_done_callback(lambda done: _in_flight.pop(key, None))
+    return future
+
+def translate_all(texts, target_lang, deadline=TRANSLATION_DEADLINE):
+    # Translates the strings concurrently. Returns (translations, pending): if the
+    # deadline passes first or a backend call fails, every string comes back in
+    # English with pending=True, and a later request for the same strings retries
+    # (or finds them in the cache).
+    texts = list(texts)
+    if target_lang == 'en' or not supported_language(target_lang):
+        # Not a language the backend could translate into: English, as before
+        # (the endpoints answer 400 for these before getting here)
+        return texts, False
+    translations, futures = {}, {}
+    for text in texts:
+        if not isinstance(text, str) or not text or text in translations or text in futures:
+            continue
+        translated = cached_translation(text, target_lang)
+        if translated is not None:
+            translations[text] = translated
+        else:
+            futures[text] = submit_translation(text, target_lang)
+    if futures:
+        wait(futures.values(), timeout=max(deadline, 0))
+        if not all(future.done() for future in futures.values()):
+            TRANSLATION_STATS['deadline_misses'] += 1
+            return texts, True
+        for text, future in futures.items():
+            translations[text] = future.result()
+        if any(translated is None for translated in translations.values()):
+            return texts, True
+    return [translations.get(text, text) if isinstance(text, str) else text for text in texts], False
+
+def translate_text(text, target_lang='en', deadline=TRANSLATION_DEADLINE):
+    return translate_all([text], target_lang, deadline)[0][0]
+
+def text_slots(node, path):
+    # (container, key) for every string a path like ('factors', '*', 'status')
+    # points at; '*' matches every key and a list at the end means each item
+    key, rest = path[0], path[1:]
+    for k in (list(node) if key == '*' else [key]):
+        if rest:
+            yield from text_slots(node[k], rest)
+        elif isinstance(node[k], list):
+            yield from ((node[k], i) for i in range(len(node[k])))
+        else:
+            yield node, k
+
+def translate_response(result, target_lang, paths, deadline=TRANSLATION_DEADLINE):
+    # Translates the given fields of a response in place, all under one deadline
+    slots = [slot for path in paths for slot in text_slots(result, path)]
+    translations, pending = translate_all([container[k] for container, k in slots], target_lang, deadline)
+    for (container, k), translated in zip(slots, translations):
+        container[k] = translated
+    result['translation_pending'] = pending
+    return result
+
+def translation_cache_stats():
+    return dict(TRANSLATION_STATS, in_flight=len(_in_flight), memory=TRANSLATION_CACHE.stats())